@@ -28,7 +28,26 @@ class Config:
             LLMProvider.LLAMA: "llama3.2-3b",
             LLMProvider.OPENAI: "gpt-4o-2024-08-06"  # GPT-4o with 128K context
         }
-        
+
+        # Context window sizes (in tokens) used for client-side preflight checks
+        self.model_context_windows = {
+            "llama3.2-3b": 8000,
+            "gpt-4o-2024-08-06": 128000
+        }
+        self.default_context_window = 8000
+
+        # Maximum concurrent requests per provider for batch operations
+        self.max_concurrent_requests = {
+            LLMProvider.LLAMA: 4,
+            LLMProvider.OPENAI: 8
+        }
+
+        # Requests-per-minute budget per provider (None = unlimited); match your account's rate-limit tier
+        self.requests_per_minute = {
+            LLMProvider.LLAMA: None,
+            LLMProvider.OPENAI: 500
+        }
+
         # Global model selection (if set, overrides task-specific models)
         self.global_model_provider = None
         self.global_model_name = None
@@ -132,7 +151,11 @@ class Config:
         elif provider == LLMProvider.OPENAI:
             return self.openai_api_base_url
         return ""
-    
+
+    def get_context_window(self, model: str) -> int:
+        """Get the context window size (in tokens) for a model"""
+        return self.model_context_windows.get(model, self.default_context_window)
+
     def set_global_model(self, provider: LLMProvider, model_name: str):
         """Set a global model that will be used for all tasks"""
         self.global_model_provider = provider
@@ -0,0 +1,31 @@
+"""
+Process-wide cache of extracted XML and anchored text for DOCX files
+"""
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, Tuple
+
+from core.extract_docx_xml import extract_docx_xml
+from core.xml_to_anchored_txt import xml_to_anchored_txt
+
+@lru_cache(maxsize=32)
+def _anchored_for(docx_path_str: str, mtime_ns: int, size: int) -> Tuple[Optional[str], Optional[str]]:
+    """Extract and anchor a DOCX; mtime and size are part of the key so edits invalidate it"""
+    xml_content = extract_docx_xml(docx_path_str, in_memory=True)
+    if not xml_content:
+        return None, None
+    return xml_content, xml_to_anchored_txt(xml_content, in_memory=True)
+
+def load_anchored_docx(docx_path) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Get (xml_content, anchored_text) for a DOCX, reusing earlier results for an unchanged file
+
+    Either value is None if that step failed.
+    """
+    docx_path = Path(docx_path).resolve()
+    try:
+        stat = docx_path.stat()
+    except OSError:
+        print(f"❌ File not found: {docx_path}")
+        return None, None
+    return _anchored_for(str(docx_path), stat.st_mtime_ns, stat.st_size)
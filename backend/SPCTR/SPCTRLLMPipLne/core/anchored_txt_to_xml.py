@@ -6,8 +6,16 @@ import re
 from pathlib import Path
 import sys
 
-def anchored_txt_to_xml(txt_path, original_xml_path, output_xml=None):
-    """Convert anchored TXT back to XML using original as template"""
+def anchored_txt_to_xml(txt_path, original_xml_path, output_xml=None, in_memory=False):
+    """
+    Convert anchored TXT back to XML using original as template
+    
+    With in_memory=True, txt_path and original_xml_path are the anchored text
+    and original XML content, and the reconstructed XML is returned as a string.
+    """
+    if in_memory:
+        return _reconstruct_xml(txt_path, original_xml_path)
+    
     txt_path = Path(txt_path)
     original_xml_path = Path(original_xml_path)
     
@@ -22,13 +30,21 @@ def anchored_txt_to_xml(txt_path, original_xml_path, output_xml=None):
         output_xml = txt_path.with_suffix('.reconstructed.xml')
     
     # Read the anchored text
-    with open(txt_path, 'r', encoding='utf-8') as f:
-        anchored_text = f.read()
+    anchored_text = txt_path.read_text(encoding='utf-8')
     
     # Parse the original XML to get structure
-    with open(original_xml_path, 'r', encoding='utf-8') as f:
-        original_xml = f.read()
+    original_xml = original_xml_path.read_text(encoding='utf-8')
+    
+    reconstructed_xml = _reconstruct_xml(anchored_text, original_xml)
     
+    # Save reconstructed XML
+    Path(output_xml).write_text(reconstructed_xml, encoding='utf-8')
+    
+    print(f"✅ Converted anchored TXT to XML: {output_xml}")
+    return str(output_xml)
+
+def _reconstruct_xml(anchored_text, original_xml):
+    """Reconstruct XML content from anchored text and the original XML content"""
     original_root = ET.fromstring(original_xml)
     namespaces = {'w': 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'}
     
@@ -40,15 +56,9 @@ def anchored_txt_to_xml(txt_path, original_xml_path, output_xml=None):
     original_paragraphs = original_root.findall('.//w:p', namespaces)
     
     # Reconstruct XML
-    reconstructed_xml = reconstruct_xml_with_anchored_text(
+    return reconstruct_xml_with_anchored_text(
         original_root, original_paragraphs, paragraphs, namespaces
     )
-    
-    # Save reconstructed XML
-    with open(output_xml, 'w', encoding='utf-8') as f:
-        f.write(reconstructed_xml)
-    
-    print(f"✅ Converted anchored TXT to XML: {output_xml}")
 
 def reconstruct_xml_with_anchored_text(original_root, original_paragraphs, anchored_paragraphs, namespaces):
     """Reconstruct XML using original structure and anchored text"""
@@ -4,137 +4,48 @@ Preserves formatting, justification, tabs, and footnotes
 """
 
 import re
+import sys
 import zipfile
+import os
 import html
 from pathlib import Path
-from typing import List, Optional
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 from dataclasses import dataclass
+from functools import lru_cache
 
-@dataclass
-class ParsedText:
-    text: str
-    is_bold: bool = False
-    is_italic: bool = False
-    is_underline: bool = False
-    is_small_caps: bool = False
-    is_superscript: bool = False
-    is_subscript: bool = False
-    font_size: Optional[int] = None
-    font_name: Optional[str] = None
-    justification: Optional[str] = None
-    tab_count: int = 0
-    tab_spacing: int = 0
-    is_footnote: bool = False
-    footnote_content: Optional[str] = None
+# Markup patterns, compiled once at import
+_JUSTIFY_RE = re.compile(r'<justify_(\w+)>(.*?)</justify_\w+>', re.DOTALL)
+_TAB_RE = re.compile(r'<tabbed_content(?: count="(\d+)"(?: spacing="(\d+)")?)?>(.*?)</tabbed_content>', re.DOTALL)
+_FOOTNOTE_RE = re.compile(r'\(Footnote: (.*?)\)', re.DOTALL)
+_TAG_RE = re.compile(r'<[^>]+>')
+_XML_INVALID_CHARS_RE = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+# All inline formatting tags as one alternation, so a paragraph is scanned once
+_FMT_RE = re.compile(
+    r'<(?P<tag>bold|italic|underline|smallcaps|superscript|subscript)>(?P<content>.*?)</(?P=tag)>'
+    r'|<font_size=(?P<font_size>\d+)>(?P<font_size_content>.*?)</font_size>'
+    r"|<font_name='(?P<font_name>[^']*)'>(?P<font_name_content>.*?)</font_name>",
+    re.DOTALL
+)
+_FMT_FLAGS = {
+    'bold': 'is_bold',
+    'italic': 'is_italic',
+    'underline': 'is_underline',
+    'smallcaps': 'is_small_caps',
+    'superscript': 'is_superscript',
+    'subscript': 'is_subscript'
+}
 
-class DocxReconstructor:
-    def __init__(self):
-        self.footnotes: List[str] = []
-        self.footnote_counter = 1
-    def reconstruct_docx(self, enhanced_text: str, output_path: str) -> str:
-        paragraphs = self._parse_enhanced_text(enhanced_text)
-        docx_path = self._create_docx_structure(paragraphs, output_path)
-        return docx_path
-    def _parse_enhanced_text(self, enhanced_text: str) -> List[List[ParsedText]]:
-        paragraphs = []
-        para_texts = enhanced_text.split('\n\n')
-        for para_text in para_texts:
-            if not para_text.strip():
-                continue
-            parsed_paragraph = self._parse_paragraph(para_text)
-            if parsed_paragraph:
-                paragraphs.append(parsed_paragraph)
-        return paragraphs
-    def _parse_paragraph(self, para_text: str) -> List[ParsedText]:
-        parsed_texts = []
-        justification = None
-        justify_match = re.search(r'<justify_(\w+)>(.*?)</justify_\w+>', para_text, re.DOTALL)
-        if justify_match:
-            justification = justify_match.group(1)
-            para_text = justify_match.group(2)
-        para_text = self._parse_tabbed_content(para_text, parsed_texts)
-        para_text = self._parse_formatting_tags(para_text, parsed_texts, justification)
-        para_text = self._parse_footnotes(para_text, parsed_texts)
-        if para_text.strip():
-            parsed_texts.append(ParsedText(text=para_text.strip(), justification=justification))
-        return parsed_texts
-    def _parse_tabbed_content(self, text: str, parsed_texts: List[ParsedText]) -> str:
-        tab_pattern = r'<tabbed_content(?: count="(\d+)"(?: spacing="(\d+)")?)?>(.*?)</tabbed_content>'
-        def replace_tabbed(match):
-            count = int(match.group(1)) if match.group(1) else 1
-            spacing = int(match.group(2)) if match.group(2) else 0
-            content = match.group(3)
-            parsed_texts.append(ParsedText(
-                text="\t" * count,
-                tab_count=count,
-                tab_spacing=spacing
-            ))
-            if content.strip():
-                parsed_texts.append(ParsedText(text=content.strip()))
-            return ""
-        return re.sub(tab_pattern, replace_tabbed, text, flags=re.DOTALL)
-    def _parse_formatting_tags(self, text: str, parsed_texts: List[ParsedText], justification: Optional[str]) -> str:
-        formatting_patterns = [
-            ('<bold>(.*?)</bold>', 'is_bold'),
-            ('<italic>(.*?)</italic>', 'is_italic'),
-            ('<underline>(.*?)</underline>', 'is_underline'),
-            ('<smallcaps>(.*?)</smallcaps>', 'is_small_caps'),
-            ('<superscript>(.*?)</superscript>', 'is_superscript'),
-            ('<subscript>(.*?)</subscript>', 'is_subscript'),
-            (r'<font_size=(\d+)>(.*?)</font_size>', 'font_size'),
-            (r"<font_name='([^']*)'>(.*?)</font_name>", 'font_name')
-        ]
-        for pattern, attr_name in formatting_patterns:
-            def replace_formatting(match):
-                if attr_name == 'font_size':
-                    value = int(match.group(1))
-                    content = match.group(2)
-                    parsed_texts.append(ParsedText(
-                        text=content,
-                        font_size=value,
-                        justification=justification
-                    ))
-                elif attr_name == 'font_name':
-                    value = match.group(1)
-                    content = match.group(2)
-                    parsed_texts.append(ParsedText(
-                        text=content,
-                        font_name=value,
-                        justification=justification
-                    ))
-                else:
-                    content = match.group(1)
-                    kwargs = {attr_name: True, 'justification': justification}
-                    parsed_texts.append(ParsedText(text=content, **kwargs))
-                return ""
-            text = re.sub(pattern, replace_formatting, text, flags=re.DOTALL)
-        return text
-    def _parse_footnotes(self, text: str, parsed_texts: List[ParsedText]) -> str:
-        footnote_pattern = r'\(Footnote: (.*?)\)'
-        def replace_footnote(match):
-            footnote_content = match.group(1)
-            self.footnotes.append(footnote_content)
-            parsed_texts.append(ParsedText(
-                text=f"[{self.footnote_counter}]",
-                is_footnote=True,
-                footnote_content=footnote_content
-            ))
-            self.footnote_counter += 1
-            return ""
-        return re.sub(footnote_pattern, replace_footnote, text, flags=re.DOTALL)
-    def _create_docx_structure(self, paragraphs: List[List[ParsedText]], output_path: str) -> str:
-        output_file = Path(output_path)
-        output_file.parent.mkdir(parents=True, exist_ok=True)
-        with zipfile.ZipFile(output_file, 'w') as zip_file:
-            self._add_content_types(zip_file)
-            self._add_relationships(zip_file)
-            self._add_main_document(zip_file, paragraphs)
-            if self.footnotes:
-                self._add_footnotes(zip_file)
-            self._add_required_files(zip_file)
-        return str(output_file)
-    def _add_content_types(self, zip_file: zipfile.ZipFile):
-        content_types = '''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+# Below this many paragraphs, process startup and pickling cost more than parallel parsing saves
+PARALLEL_PARSE_MIN_PARAGRAPHS = 5000
+
+_DOCUMENT_XML_HEAD = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                      '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+                      '<w:body>')
+_DOCUMENT_XML_TAIL = '</w:body></w:document>'
+
+# Static package parts, pre-encoded once at import
+_CONTENT_TYPES_XML = b'''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
 <Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
     <Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
     <Default Extension="xml" ContentType="application/xml"/>
@@ -146,116 +57,25 @@ class DocxReconstructor:
     <Override PartName="/docProps/core.xml" ContentType="application/vnd.openxmlformats-package.core-properties+xml"/>
     <Override PartName="/docProps/app.xml" ContentType="application/vnd.openxmlformats-officedocument.extended-properties+xml"/>
 </Types>'''
-        zip_file.writestr('[Content_Types].xml', content_types)
-    def _add_relationships(self, zip_file: zipfile.ZipFile):
-        relationships = '''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+_RELATIONSHIPS_XML = b'''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
 <Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
     <Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="word/document.xml"/>
     <Relationship Id="rId2" Type="http://schemas.openxmlformats.org/package/2006/relationships/metadata/core-properties" Target="docProps/core.xml"/>
     <Relationship Id="rId3" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/extended-properties" Target="docProps/app.xml"/>
 </Relationships>'''
-        zip_file.writestr('_rels/.rels', relationships)
-        doc_relationships = '''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+_DOC_RELATIONSHIPS_XML = b'''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
 <Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
     <Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/footnotes" Target="footnotes.xml"/>
     <Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/settings" Target="settings.xml"/>
     <Relationship Id="rId3" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>
     <Relationship Id="rId4" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/fontTable" Target="fontTable.xml"/>
 </Relationships>'''
-        zip_file.writestr('word/_rels/document.xml.rels', doc_relationships)
-    def _add_main_document(self, zip_file: zipfile.ZipFile, paragraphs: List[List[ParsedText]]):
-        document_xml = self._create_document_xml(paragraphs)
-        zip_file.writestr('word/document.xml', document_xml)
-    def _create_document_xml(self, paragraphs: List[List[ParsedText]]) -> str:
-        xml_parts = [
-            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>',
-            '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">',
-            '<w:body>'
-        ]
-        for paragraph in paragraphs:
-            xml_parts.append(self._create_paragraph_xml(paragraph))
-        xml_parts.extend(['</w:body>', '</w:document>'])
-        return ''.join(xml_parts)
-    def _create_paragraph_xml(self, paragraph: List[ParsedText]) -> str:
-        if not paragraph:
-            return ""
-        justification = paragraph[0].justification if paragraph else None
-        xml_parts = ['<w:p>']
-        if justification and justification != 'left':
-            xml_parts.append(f'<w:pPr><w:jc w:val="{justification}"/></w:pPr>')
-        for parsed_text in paragraph:
-            xml_parts.append(self._create_run_xml(parsed_text))
-        xml_parts.append('</w:p>')
-        return ''.join(xml_parts)
-    def _create_run_xml(self, parsed_text: ParsedText) -> str:
-        xml_parts = ['<w:r>']
-        run_props = []
-        if parsed_text.is_bold:
-            run_props.append('<w:b/>')
-        if parsed_text.is_italic:
-            run_props.append('<w:i/>')
-        if parsed_text.is_underline:
-            run_props.append('<w:u w:val="single"/>')
-        if parsed_text.is_small_caps:
-            run_props.append('<w:smallCaps/>')
-        if parsed_text.is_superscript:
-            run_props.append('<w:vertAlign w:val="superscript"/>')
-        if parsed_text.is_subscript:
-            run_props.append('<w:vertAlign w:val="subscript"/>')
-        if parsed_text.font_size:
-            run_props.append(f'<w:sz w:val="{parsed_text.font_size}"/>')
-        if parsed_text.font_name:
-            run_props.append(f'<w:rFonts w:ascii="{parsed_text.font_name}"/>')
-        if run_props:
-            xml_parts.append(f'<w:rPr>{"" .join(run_props)}</w:rPr>')
-        if parsed_text.is_footnote:
-            if parsed_text.footnote_content is not None:
-                xml_parts.append(f'<w:footnoteReference w:id="{self.footnotes.index(parsed_text.footnote_content) + 1}"/>')
-        elif parsed_text.tab_count > 0:
-            for _ in range(parsed_text.tab_count):
-                xml_parts.append('<w:tab/>')
-            if parsed_text.tab_spacing > 0:
-                xml_parts.append(f'<w:t xml:space="preserve">{" " * parsed_text.tab_spacing}</w:t>')
-        else:
-            # Decode HTML entities and escape XML characters
-            text = html.unescape(parsed_text.text)
-            # Remove XML tags from the text (like <bold>, <italic>, etc.)
-            text = re.sub(r'<[^>]+>', '', text)
-            text = text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-            xml_parts.append(f'<w:t xml:space="preserve">{text}</w:t>')
-        xml_parts.append('</w:r>')
-        return ''.join(xml_parts)
-    def _add_footnotes(self, zip_file: zipfile.ZipFile):
-        footnotes_xml = self._create_footnotes_xml()
-        zip_file.writestr('word/footnotes.xml', footnotes_xml)
-    def _create_footnotes_xml(self) -> str:
-        xml_parts = [
-            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>',
-            '<w:footnotes xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">',
-            '<w:footnote w:type="separator" w:id="-1"><w:p><w:r><w:separator/></w:r></w:p></w:footnote>',
-            '<w:footnote w:type="continuationSeparator" w:id="0"><w:p><w:r><w:continuationSeparator/></w:r></w:p></w:footnote>'
-        ]
-        for i, footnote_content in enumerate(self.footnotes, 1):
-            # Decode HTML entities in footnote content
-            footnote_content = html.unescape(footnote_content)
-            footnote_content = footnote_content.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-            xml_parts.append(f'<w:footnote w:id="{i}">')
-            xml_parts.append('<w:p>')
-            xml_parts.append('<w:r>')
-            xml_parts.append(f'<w:t>{footnote_content}</w:t>')
-            xml_parts.append('</w:r>')
-            xml_parts.append('</w:p>')
-            xml_parts.append('</w:footnote>')
-        xml_parts.append('</w:footnotes>')
-        return ''.join(xml_parts)
-    def _add_required_files(self, zip_file: zipfile.ZipFile):
-        settings = '''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+_SETTINGS_XML = b'''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
 <w:settings xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">
     <w:zoom w:percent="100"/>
     <w:defaultTabStop w:val="720"/>
 </w:settings>'''
-        zip_file.writestr('word/settings.xml', settings)
-        styles = '''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+_STYLES_XML = b'''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
 <w:styles xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">
     <w:docDefaults>
         <w:rPrDefault>
@@ -266,8 +86,7 @@ class DocxReconstructor:
         </w:rPrDefault>
     </w:docDefaults>
 </w:styles>'''
-        zip_file.writestr('word/styles.xml', styles)
-        font_table = '''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+_FONT_TABLE_XML = b'''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
 <w:fonts xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">
     <w:font w:name="Calibri">
         <w:panose1 w:val="020F0502020204030204"/>
@@ -277,8 +96,7 @@ class DocxReconstructor:
         <w:sig w:usb0="E00002FF" w:usb1="4000ACFF" w:usb2="00000001" w:usb3="00000000" w:csb0="0000019F" w:csb1="00000000"/>
     </w:font>
 </w:fonts>'''
-        zip_file.writestr('word/fontTable.xml', font_table)
-        core_props = '''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+_CORE_PROPS_XML = b'''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
 <cp:coreProperties xmlns:cp="http://schemas.openxmlformats.org/package/2006/metadata/core-properties" xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:dcterms="http://purl.org/dc/terms/" xmlns:dcmitype="http://purl.org/dc/dcmitype/" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">
     <dc:title></dc:title>
     <dc:subject></dc:subject>
@@ -290,8 +108,7 @@ class DocxReconstructor:
     <dcterms:created xsi:type="dcterms:W3CDTF">2024-01-01T00:00:00Z</dcterms:created>
     <dcterms:modified xsi:type="dcterms:W3CDTF">2024-01-01T00:00:00Z</dcterms:modified>
 </cp:coreProperties>'''
-        zip_file.writestr('docProps/core.xml', core_props)
-        app_props = '''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+_APP_PROPS_XML = b'''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
 <Properties xmlns="http://schemas.openxmlformats.org/officeDocument/2006/extended-properties" xmlns:vt="http://schemas.openxmlformats.org/officeDocument/2006/docPropsVTypes">
     <Template>Normal.dotm</Template>
     <TotalTime>0</TotalTime>
@@ -310,21 +127,336 @@ class DocxReconstructor:
     <HyperlinksChanged>false</HyperlinksChanged>
     <AppVersion>16.0000</AppVersion>
 </Properties>'''
-        zip_file.writestr('docProps/app.xml', app_props)
 
-def reconstruct_docx_from_enhanced_text(enhanced_text_path: str, output_path: str) -> str:
-    with open(enhanced_text_path, 'r', encoding='utf-8') as f:
-        enhanced_text = f.read()
-    if "MAIN TEXT" in enhanced_text:
-        main_text_end = enhanced_text.find("------------------------------------------------------------")
-        if main_text_end != -1:
-            main_text = enhanced_text[main_text_end + 60:]
+_ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+# document.xml fragments joined and encoded per write
+_ENTRY_WRITE_BATCH = 4096
+
+# Archive entries for the static parts, in write order around document.xml/footnotes.xml
+_PACKAGE_HEAD_ENTRIES = (
+    ('[Content_Types].xml', _CONTENT_TYPES_XML),
+    ('_rels/.rels', _RELATIONSHIPS_XML),
+    ('word/_rels/document.xml.rels', _DOC_RELATIONSHIPS_XML),
+)
+_REQUIRED_ENTRIES = (
+    ('word/settings.xml', _SETTINGS_XML),
+    ('word/styles.xml', _STYLES_XML),
+    ('word/fontTable.xml', _FONT_TABLE_XML),
+    ('docProps/core.xml', _CORE_PROPS_XML),
+    ('docProps/app.xml', _APP_PROPS_XML),
+)
+
+@lru_cache(maxsize=256)
+def _run_properties_xml(is_bold: bool, is_italic: bool, is_underline: bool, is_small_caps: bool,
+                        is_superscript: bool, is_subscript: bool, font_size: Optional[int],
+                        font_name: Optional[str]) -> str:
+    """Serialized <w:rPr> for a style combination; documents use only a handful, so this is nearly always a cache hit"""
+    run_props = []
+    if is_bold:
+        run_props.append('<w:b/>')
+    if is_italic:
+        run_props.append('<w:i/>')
+    if is_underline:
+        run_props.append('<w:u w:val="single"/>')
+    if is_small_caps:
+        run_props.append('<w:smallCaps/>')
+    if is_superscript:
+        run_props.append('<w:vertAlign w:val="superscript"/>')
+    if is_subscript:
+        run_props.append('<w:vertAlign w:val="subscript"/>')
+    if font_size:
+        run_props.append(f'<w:sz w:val="{font_size}"/>')
+    if font_name:
+        run_props.append(f'<w:rFonts w:ascii="{_escape_xml(font_name, quote=True)}"/>')
+    return f'<w:rPr>{"".join(run_props)}</w:rPr>'
+
+def _strip_invalid_xml_chars(text: str) -> str:
+    # Control characters (e.g. Word's vertical tab) are not allowed in XML 1.0 at all;
+    # one pass over the whole input is far cheaper than checking every run
+    return _XML_INVALID_CHARS_RE.sub('', text)
+
+def _iter_paragraphs(text: str) -> Iterator[str]:
+    # Same pieces as text.split('\n\n'), yielded one at a time instead of materialized as a list
+    start = 0
+    n = len(text)
+    while start <= n:
+        end = text.find('\n\n', start)
+        if end < 0:
+            end = n
+        yield text[start:end]
+        start = end + 2
+
+def _escape_xml(text: str, quote: bool = False) -> str:
+    # Chained replace beats str.translate here: each replace is a C-level scan that returns
+    # the same string untouched when the character is absent, whereas translate with
+    # multi-character replacements goes through a per-character slow path
+    text = text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+    if quote:
+        text = text.replace('"', '&quot;')
+    return text
+
+# One ParsedText per run: slots (3.10+) drop the per-instance __dict__; older Pythons get a plain dataclass
+@dataclass(**({'slots': True} if sys.version_info >= (3, 10) else {}))
+class ParsedText:
+    text: str
+    is_bold: bool = False
+    is_italic: bool = False
+    is_underline: bool = False
+    is_small_caps: bool = False
+    is_superscript: bool = False
+    is_subscript: bool = False
+    font_size: Optional[int] = None
+    font_name: Optional[str] = None
+    justification: Optional[str] = None
+    tab_count: int = 0
+    tab_spacing: int = 0
+    is_footnote: bool = False
+    footnote_content: Optional[str] = None
+
+class DocxReconstructor:
+    def __init__(self):
+        self.footnotes: List[str] = []
+        self.footnote_counter = 1
+        # Footnote content -> id of its first occurrence, for O(1) reference lookup
+        self._footnote_id: Dict[str, int] = {}
+    def reconstruct_docx(self, enhanced_text: str, output_path: str, workers: Optional[int] = None) -> str:
+        paragraphs = self._parse_enhanced_text(_strip_invalid_xml_chars(enhanced_text), workers)
+        docx_path = self._create_docx_structure(paragraphs, output_path)
+        return docx_path
+    def reconstruct_docx_streaming(self, enhanced_text: str, output_path: str) -> str:
+        """Same output as reconstruct_docx, but runs are written as XML straight from the parser, with no ParsedText objects"""
+        parts = [_DOCUMENT_XML_HEAD]
+        for para_text in _iter_paragraphs(_strip_invalid_xml_chars(enhanced_text)):
+            if not para_text.strip():
+                continue
+            run_parts = []
+            # The paragraph's justification is taken from its first run, as in _append_paragraph_xml
+            first_justification = []
+            def add_run(justification=None, **fields):
+                if not first_justification:
+                    first_justification.append(justification)
+                self._emit_run(run_parts, **fields)
+            self._scan_paragraph(para_text, add_run)
+            if run_parts:
+                self._append_paragraph_open(parts, first_justification[0])
+                parts.extend(run_parts)
+                parts.append('</w:p>')
+        parts.append(_DOCUMENT_XML_TAIL)
+        return self._write_docx(parts, output_path)
+    def _parse_enhanced_text(self, enhanced_text: str, workers: Optional[int] = None) -> List[List[ParsedText]]:
+        if workers and workers > 1:
+            para_texts = [para_text for para_text in _iter_paragraphs(enhanced_text) if para_text.strip()]
+            if len(para_texts) >= PARALLEL_PARSE_MIN_PARAGRAPHS:
+                return self._parse_paragraphs_parallel(para_texts, workers)
+        else:
+            para_texts = (para_text for para_text in _iter_paragraphs(enhanced_text) if para_text.strip())
+        paragraphs = []
+        for para_text in para_texts:
+            parsed_paragraph = self._parse_paragraph(para_text)
+            if parsed_paragraph:
+                paragraphs.append(parsed_paragraph)
+        return paragraphs
+    def _parse_paragraphs_parallel(self, para_texts: List[str], workers: int) -> List[List[ParsedText]]:
+        # Paragraphs parse independently; only footnote numbering is global, so workers
+        # number from 1 and the references are renumbered here in document order
+        chunksize = max(1, len(para_texts) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=min(workers, os.cpu_count() or 1)) as executor:
+            results = list(executor.map(_parse_paragraph_standalone, para_texts, chunksize=chunksize))
+        paragraphs = []
+        for parsed_paragraph in results:
+            if not parsed_paragraph:
+                continue
+            for parsed_text in parsed_paragraph:
+                if parsed_text.is_footnote:
+                    self.footnotes.append(parsed_text.footnote_content)
+                    self._footnote_id.setdefault(parsed_text.footnote_content, self.footnote_counter)
+                    parsed_text.text = f"[{self.footnote_counter}]"
+                    self.footnote_counter += 1
+            paragraphs.append(parsed_paragraph)
+        return paragraphs
+    def _parse_paragraph(self, para_text: str) -> List[ParsedText]:
+        parsed_texts = []
+        self._scan_paragraph(para_text, lambda **fields: parsed_texts.append(ParsedText(**fields)))
+        return parsed_texts
+    def _scan_paragraph(self, para_text: str, add_run: Callable[..., None]):
+        # add_run receives each run's ParsedText fields as keywords, in document order
+        justification = None
+        # Cheap substring checks let plain paragraphs skip the regex passes entirely
+        if '<' in para_text:
+            justify_match = _JUSTIFY_RE.search(para_text)
+            if justify_match:
+                justification = justify_match.group(1)
+                para_text = justify_match.group(2)
+            if '<tabbed_content' in para_text:
+                para_text = self._parse_tabbed_content(para_text, add_run)
+            para_text = self._parse_formatting_tags(para_text, add_run, justification)
+        if '(Footnote: ' in para_text:
+            para_text = self._parse_footnotes(para_text, add_run)
+        para_text = para_text.strip()
+        if para_text:
+            add_run(text=para_text, justification=justification)
+    def _parse_tabbed_content(self, text: str, add_run: Callable[..., None]) -> str:
+        def replace_tabbed(match):
+            count = int(match.group(1)) if match.group(1) else 1
+            spacing = int(match.group(2)) if match.group(2) else 0
+            content = match.group(3)
+            add_run(text="\t" * count, tab_count=count, tab_spacing=spacing)
+            if content.strip():
+                add_run(text=content.strip())
+            return ""
+        return _TAB_RE.sub(replace_tabbed, text)
+    def _parse_formatting_tags(self, text: str, add_run: Callable[..., None], justification: Optional[str]) -> str:
+        def add_formatted(content: str, kwargs: Dict):
+            # Nested tags (xml_to_anchored_txt wraps a multi-property run as
+            # <italic><bold>x</bold></italic>) merge their flags into one run
+            pos = 0
+            if '<' in content:
+                for match in _FMT_RE.finditer(content):
+                    if match.start() > pos:
+                        add_run(text=content[pos:match.start()], justification=justification, **kwargs)
+                    add_match(match, kwargs)
+                    pos = match.end()
+            if pos == 0 or pos < len(content):
+                add_run(text=content[pos:], justification=justification, **kwargs)
+        def add_match(match, inherited: Dict):
+            if match.group('tag'):
+                kwargs = {_FMT_FLAGS[match.group('tag')]: True}
+                content = match.group('content')
+            elif match.group('font_size'):
+                kwargs = {'font_size': int(match.group('font_size'))}
+                content = match.group('font_size_content')
+            else:
+                kwargs = {'font_name': match.group('font_name')}
+                content = match.group('font_name_content')
+            add_formatted(content, {**inherited, **kwargs})
+        def replace_formatting(match):
+            add_match(match, {})
+            return ""
+        return _FMT_RE.sub(replace_formatting, text)
+    def _parse_footnotes(self, text: str, add_run: Callable[..., None]) -> str:
+        def replace_footnote(match):
+            footnote_content = match.group(1)
+            self.footnotes.append(footnote_content)
+            self._footnote_id.setdefault(footnote_content, self.footnote_counter)
+            add_run(text=f"[{self.footnote_counter}]", is_footnote=True, footnote_content=footnote_content)
+            self.footnote_counter += 1
+            return ""
+        return _FOOTNOTE_RE.sub(replace_footnote, text)
+    def _create_docx_structure(self, paragraphs: List[List[ParsedText]], output_path: str) -> str:
+        return self._write_docx(self._document_xml_parts(paragraphs), output_path)
+    def _write_docx(self, document_parts: List[str], output_path: str) -> str:
+        output_file = Path(output_path)
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        # XML parts compress ~10:1; Word itself writes DOCX members deflated
+        # Reconstructed documents are nowhere near 2 GB, so ZIP64 is never needed
+        with zipfile.ZipFile(output_file, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=6,
+                             allowZip64=False) as zip_file:
+            self._add_static_entries(zip_file, _PACKAGE_HEAD_ENTRIES)
+            self._write_entry_parts(zip_file, 'word/document.xml', document_parts)
+            if self.footnotes:
+                self._add_footnotes(zip_file)
+            self._add_static_entries(zip_file, _REQUIRED_ENTRIES)
+        return str(output_file)
+    def _add_static_entries(self, zip_file: zipfile.ZipFile, entries: Tuple[Tuple[str, bytes], ...]):
+        for name, data in entries:
+            self._write_entry(zip_file, name, data)
+    def _entry_info(self, name: str) -> zipfile.ZipInfo:
+        # A fixed timestamp makes identical input produce a byte-identical DOCX
+        info = zipfile.ZipInfo(name, date_time=_ZIP_DATE_TIME)
+        info.external_attr = 0o600 << 16  # Same permissions writestr gives a plain name
+        info.compress_type = zipfile.ZIP_DEFLATED
+        return info
+    def _write_entry(self, zip_file: zipfile.ZipFile, name: str, data):
+        zip_file.writestr(self._entry_info(name), data, compresslevel=6)
+    def _write_entry_parts(self, zip_file: zipfile.ZipFile, name: str, parts: List[str]):
+        # Join and encode in batches, so the whole XML never exists as one str plus its
+        # UTF-8 copy; one join+encode per batch stays far cheaper than encoding each fragment
+        with zip_file.open(self._entry_info(name), 'w') as entry:
+            for i in range(0, len(parts), _ENTRY_WRITE_BATCH):
+                entry.write(''.join(parts[i:i + _ENTRY_WRITE_BATCH]).encode('utf-8'))
+    def _document_xml_parts(self, paragraphs: List[List[ParsedText]]) -> List[str]:
+        # Every fragment goes into one flat list that is written out in batches
+        parts = [_DOCUMENT_XML_HEAD]
+        for paragraph in paragraphs:
+            self._append_paragraph_xml(parts, paragraph)
+        parts.append(_DOCUMENT_XML_TAIL)
+        return parts
+    def _append_paragraph_xml(self, parts: List[str], paragraph: List[ParsedText]):
+        if not paragraph:
+            return
+        self._append_paragraph_open(parts, paragraph[0].justification)
+        for pt in paragraph:
+            self._emit_run(parts, pt.text, pt.is_bold, pt.is_italic, pt.is_underline, pt.is_small_caps,
+                           pt.is_superscript, pt.is_subscript, pt.font_size, pt.font_name,
+                           pt.tab_count, pt.tab_spacing, pt.is_footnote, pt.footnote_content)
+        parts.append('</w:p>')
+    def _append_paragraph_open(self, parts: List[str], justification: Optional[str]):
+        parts.append('<w:p>')
+        if justification and justification != 'left':
+            parts.append(f'<w:pPr><w:jc w:val="{justification}"/></w:pPr>')
+    def _emit_run(self, parts: List[str], text: str, is_bold: bool = False, is_italic: bool = False,
+                  is_underline: bool = False, is_small_caps: bool = False, is_superscript: bool = False,
+                  is_subscript: bool = False, font_size: Optional[int] = None, font_name: Optional[str] = None,
+                  tab_count: int = 0, tab_spacing: int = 0, is_footnote: bool = False,
+                  footnote_content: Optional[str] = None):
+        parts.append('<w:r>')
+        if is_bold or is_italic or is_underline or is_small_caps or is_superscript or is_subscript \
+                or font_size or font_name:
+            parts.append(_run_properties_xml(is_bold, is_italic, is_underline, is_small_caps,
+                                             is_superscript, is_subscript, font_size, font_name))
+        if is_footnote:
+            if footnote_content is not None:
+                parts.append(f'<w:footnoteReference w:id="{self._footnote_id[footnote_content]}"/>')
+        elif tab_count > 0:
+            parts.append('<w:tab/>' * tab_count)
+            if tab_spacing > 0:
+                parts.append(f'<w:t xml:space="preserve">{" " * tab_spacing}</w:t>')
         else:
-            main_text = enhanced_text
+            # Decode HTML entities (skipping the call for the common entity-free run) and escape XML characters
+            if '&' in text:
+                text = html.unescape(text)
+            # Remove XML tags from the text (like <bold>, <italic>, etc.); most runs have none
+            if '<' in text:
+                text = _TAG_RE.sub('', text)
+            text = _escape_xml(text)
+            parts.append(f'<w:t xml:space="preserve">{text}</w:t>')
+        parts.append('</w:r>')
+    def _add_footnotes(self, zip_file: zipfile.ZipFile):
+        footnotes_xml = self._create_footnotes_xml()
+        self._write_entry(zip_file, 'word/footnotes.xml', footnotes_xml)
+    def _create_footnotes_xml(self) -> str:
+        xml_parts = [
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>',
+            '<w:footnotes xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">',
+            '<w:footnote w:type="separator" w:id="-1"><w:p><w:r><w:separator/></w:r></w:p></w:footnote>',
+            '<w:footnote w:type="continuationSeparator" w:id="0"><w:p><w:r><w:continuationSeparator/></w:r></w:p></w:footnote>'
+        ]
+        for i, footnote_content in enumerate(self.footnotes, 1):
+            # Decode HTML entities in footnote content
+            if '&' in footnote_content:
+                footnote_content = html.unescape(footnote_content)
+            footnote_content = _escape_xml(footnote_content)
+            xml_parts.append(f'<w:footnote w:id="{i}"><w:p><w:r><w:t>{footnote_content}</w:t></w:r></w:p></w:footnote>')
+        xml_parts.append('</w:footnotes>')
+        return ''.join(xml_parts)
+
+_MAIN_TEXT_RULE = "-" * 60
+
+def _parse_paragraph_standalone(para_text: str) -> List[ParsedText]:
+    # Module-level so ProcessPoolExecutor workers can pickle it
+    return DocxReconstructor()._parse_paragraph(para_text)
+
+def reconstruct_docx_from_enhanced_text(enhanced_text_path: str, output_path: str) -> str:
+    enhanced_text = Path(enhanced_text_path).read_text(encoding='utf-8')
+    # Debug dumps have a "MAIN TEXT" header ending in a 60-dash rule; only the prefix
+    # before the rule needs checking for the header
+    main_text_end = enhanced_text.find(_MAIN_TEXT_RULE)
+    if main_text_end != -1 and "MAIN TEXT" in enhanced_text[:main_text_end]:
+        main_text = enhanced_text[main_text_end + len(_MAIN_TEXT_RULE):]
     else:
         main_text = enhanced_text
     reconstructor = DocxReconstructor()
-    docx_path = reconstructor.reconstruct_docx(main_text, output_path)
+    docx_path = reconstructor.reconstruct_docx_streaming(main_text, output_path)
     print(f"✅ DOCX reconstructed successfully: {docx_path}")
     return docx_path
 if __name__ == "__main__":
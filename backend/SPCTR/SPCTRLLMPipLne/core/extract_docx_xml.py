@@ -5,11 +5,18 @@ import zipfile
 from pathlib import Path
 import sys
 
-def extract_docx_xml(docx_path, output_txt=None):
+def extract_docx_xml(docx_path, output_txt=None, in_memory=False):
+    """Extract word/document.xml; with in_memory=True return the XML text instead of a file path"""
     docx_path = Path(docx_path)
     if not docx_path.exists():
         print(f"❌ File not found: {docx_path}")
         return None
+    if in_memory:
+        with zipfile.ZipFile(docx_path, 'r') as z:
+            if 'word/document.xml' not in z.namelist():
+                print("❌ word/document.xml not found in DOCX!")
+                return None
+            return z.read('word/document.xml').decode('utf-8')
     if output_txt is None:
         output_txt = docx_path.with_name(f"{docx_path.stem}_raw.xml.txt")
     else:
@@ -6,6 +6,8 @@ from pathlib import Path
 import sys
 import shutil
 
+COPY_BUFFER_SIZE = 1024 * 1024
+
 def repackage_docx_xml(original_docx, xml_txt, output_docx=None):
     original_docx = Path(original_docx)
     xml_txt = Path(xml_txt)
@@ -19,15 +21,21 @@ def repackage_docx_xml(original_docx, xml_txt, output_docx=None):
         output_docx = original_docx.with_name(f"{original_docx.stem}_repackaged.docx")
     else:
         output_docx = Path(output_docx)
-    # Copy the original DOCX to the output path
-    shutil.copyfile(original_docx, output_docx)
     # Read the replacement XML
-    with open(xml_txt, 'r', encoding='utf-8') as f:
-        new_xml = f.read().encode('utf-8')
-    # Replace document.xml in the new DOCX
-    with zipfile.ZipFile(output_docx, 'a') as z:
-        z.writestr('word/document.xml', new_xml)
+    new_xml = xml_txt.read_bytes()
+    # Copy every other entry into a fresh archive in one pass (appending would leave the
+    # old document.xml in place as a duplicate entry)
+    with zipfile.ZipFile(original_docx, 'r') as zin, \
+            zipfile.ZipFile(output_docx, 'w', zipfile.ZIP_DEFLATED) as zout:
+        for item in zin.infolist():
+            if item.filename == 'word/document.xml':
+                continue
+            # Stream each entry through a 1 MiB buffer rather than reading it whole into memory
+            with zin.open(item) as src, zout.open(item, 'w') as dst:
+                shutil.copyfileobj(src, dst, COPY_BUFFER_SIZE)
+        zout.writestr('word/document.xml', new_xml)
     print(f"✅ Repackaged DOCX created: {output_docx}")
+    return str(output_docx)
 
 if __name__ == "__main__":
     if len(sys.argv) < 3:
@@ -1,13 +1,67 @@
 """
 Convert XML to TXT with invisible anchor tokens for LLM processing
 """
-import xml.etree.ElementTree as ET
 import re
 from pathlib import Path
 import sys
 
-def xml_to_anchored_txt(xml_path, output_txt=None):
-    """Convert XML to TXT with anchor tokens for each paragraph"""
+try:
+    from lxml import etree as ET
+    LXML_AVAILABLE = True
+except ImportError:
+    import xml.etree.ElementTree as ET
+    LXML_AVAILABLE = False
+    # ElementTree silently degrades to its pure-Python parser (over 10x slower) without _elementtree
+    try:
+        import _elementtree
+        if ET.XMLParser is not _elementtree.XMLParser:
+            raise ImportError
+    except ImportError:
+        print("⚠️ Neither lxml nor the C ElementTree accelerator is available; XML parsing will be slow")
+
+# lxml: lift the libxml2 size limits for very large documents and skip the xml:id index
+_XML_PARSER = ET.XMLParser(huge_tree=True, collect_ids=False) if LXML_AVAILABLE else None
+
+# Output buffer for streaming anchored text to a file
+WRITE_BUFFER_SIZE = 1 << 20
+
+# WordprocessingML tags and attributes in Clark notation, expanded once so that
+# iter()/get() need no prefix mapping. OOXML puts rPr, text, tabs and footnote
+# references directly under the run, and the formatting flags directly under rPr
+W_NAMESPACES = {'w': 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'}
+_W = '{%s}' % W_NAMESPACES['w']
+W_P = _W + 'p'
+W_R = _W + 'r'
+W_RPR = _W + 'rPr'
+W_T = _W + 't'
+W_TAB = _W + 'tab'
+W_FOOTNOTE_REF = _W + 'footnoteReference'
+W_VERTALIGN = _W + 'vertAlign'
+W_VAL = _W + 'val'
+W_ID = _W + 'id'
+
+# rPr flags kept as inline (open, close) markers, in the order they are applied
+_RUN_FORMAT_MARKERS = (
+    (_W + 'b', ('<bold>', '</bold>')),
+    (_W + 'i', ('<italic>', '</italic>')),
+    (_W + 'u', ('<underline>', '</underline>')),
+    (_W + 'smallCaps', ('<smallcaps>', '</smallcaps>'))
+)
+_SUPERSCRIPT_MARKER = ('<superscript>', '</superscript>')
+
+def xml_to_anchored_txt(xml_path, output_txt=None, in_memory=False):
+    """
+    Convert XML to TXT with anchor tokens for each paragraph
+    
+    With in_memory=True, xml_path is the XML content itself and the anchored
+    text is returned instead of being written to a file.
+    """
+    if in_memory:
+        final_text, paragraph_counter = _build_anchored_text(xml_path)
+        print(f"✅ Converted XML to anchored text in memory")
+        print(f"📊 Added {paragraph_counter} anchor tokens")
+        return final_text
+    
     xml_path = Path(xml_path)
     if not xml_path.exists():
         print(f"❌ File not found: {xml_path}")
@@ -16,87 +70,94 @@ def xml_to_anchored_txt(xml_path, output_txt=None):
     if output_txt is None:
         output_txt = xml_path.with_suffix('.anchored.txt')
     
-    # Parse XML
-    with open(xml_path, 'r', encoding='utf-8') as f:
-        xml_content = f.read()
-    
-    root = ET.fromstring(xml_content)
-    namespaces = {'w': 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'}
+    # Let the parser read the file itself, with no intermediate bytes or str copy
+    root = ET.parse(str(xml_path), _XML_PARSER).getroot()
     
-    # Extract paragraphs with anchor tokens
-    anchored_text = []
+    # Write each anchored paragraph as it is built instead of joining the whole text first
     paragraph_counter = 0
+    with open(output_txt, 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as f:
+        for paragraph_counter, anchored_paragraph in enumerate(_iter_anchored_paragraphs(root), 1):
+            if paragraph_counter > 1:
+                f.write('\n\n')
+            f.write(anchored_paragraph)
+    
+    print(f"✅ Converted XML to anchored TXT: {output_txt}")
+    print(f"📊 Added {paragraph_counter} anchor tokens")
+    return str(output_txt)
+
+def _build_anchored_text(xml_content):
+    """Build anchored text from XML content (str or bytes), returning (text, paragraph_count)"""
+    if isinstance(xml_content, str):
+        # lxml rejects str input that carries an encoding declaration
+        xml_content = xml_content.encode('utf-8')
+    root = ET.fromstring(xml_content, _XML_PARSER)
+    anchored_text = list(_iter_anchored_paragraphs(root))
     
-    for paragraph in root.findall('.//w:p', namespaces):
-        paragraph_counter += 1
+    # Join paragraphs with double newlines
+    return '\n\n'.join(anchored_text), len(anchored_text)
+
+def _iter_anchored_paragraphs(root):
+    """Yield each paragraph under a parsed root, prefixed with its anchor token"""
+    for paragraph_counter, paragraph in enumerate(root.iter(W_P), 1):
         anchor_token = f"⟦P-{paragraph_counter:05d}⟧"
         
         # Extract text from this paragraph
-        paragraph_text = extract_paragraph_text(paragraph, namespaces)
+        paragraph_text = extract_paragraph_text(paragraph)
         
         # Add anchor token at the beginning of paragraph
-        anchored_text.append(f"{anchor_token}{paragraph_text}")
-    
-    # Join paragraphs with double newlines
-    final_text = '\n\n'.join(anchored_text)
-    
-    # Save to file
-    with open(output_txt, 'w', encoding='utf-8') as f:
-        f.write(final_text)
-    
-    print(f"✅ Converted XML to anchored TXT: {output_txt}")
-    print(f"📊 Added {paragraph_counter} anchor tokens")
-    return str(output_txt)
+        yield f"{anchor_token}{paragraph_text}"
+
+def extract_paragraph_text(paragraph, namespaces=None):
+    """
+    Extract text from a paragraph, keeping only essential formatting
 
-def extract_paragraph_text(paragraph, namespaces):
-    """Extract text from a paragraph, keeping only essential formatting"""
+    namespaces is accepted for compatibility; tags are matched in Clark notation.
+    """
     text_parts = []
     
-    for run in paragraph.findall('.//w:r', namespaces):
-        run_text = ""
-        
-        # Get run properties for formatting
-        rPr = run.find('.//w:rPr', namespaces)
+    # Runs may sit inside w:hyperlink, w:ins or w:smartTag, so search all descendants
+    for run in paragraph.iter(W_R):
         formatting_tags = []
+        texts = []
+        has_tab = False
+        ref_id = None
         
-        if rPr is not None:
-            # Check for essential formatting
-            if rPr.find('.//w:b', namespaces) is not None:
-                formatting_tags.append('<bold>')
-            if rPr.find('.//w:i', namespaces) is not None:
-                formatting_tags.append('<italic>')
-            if rPr.find('.//w:u', namespaces) is not None:
-                formatting_tags.append('<underline>')
-            if rPr.find('.//w:smallCaps', namespaces) is not None:
-                formatting_tags.append('<smallcaps>')
-            
-            # Check for superscript (important for footnotes)
-            vert_align = rPr.find('.//w:vertAlign', namespaces)
-            if vert_align is not None and vert_align.get('w:val') == 'superscript':
-                formatting_tags.append('<superscript>')
+        # One pass over the run's children instead of a separate lookup per property
+        for child in run:
+            tag = child.tag
+            if tag == W_T:
+                if child.text:
+                    # Preserve exact whitespace
+                    texts.append(child.text)
+            elif tag == W_RPR:
+                # Check for essential formatting
+                props = {prop.tag: prop for prop in child}
+                formatting_tags = [marker for prop_tag, marker in _RUN_FORMAT_MARKERS if prop_tag in props]
+                
+                # Check for superscript (important for footnotes)
+                vert_align = props.get(W_VERTALIGN)
+                if vert_align is not None and vert_align.get(W_VAL) == 'superscript':
+                    formatting_tags.append(_SUPERSCRIPT_MARKER)
+            elif tag == W_TAB:
+                has_tab = True
+            elif tag == W_FOOTNOTE_REF and ref_id is None:
+                ref_id = child.get(W_ID)
         
-        # Extract text content
-        for text_elem in run.findall('.//w:t', namespaces):
-            if text_elem.text:
-                # Preserve exact whitespace
-                text = text_elem.text
-                run_text += text
+        run_text = ''.join(texts)
         
         # Check for tabs
-        if run.find('.//w:tab', namespaces) is not None:
+        if has_tab:
             run_text += "\t"
         
         # Check for footnote references
-        footnote_ref = run.find('.//w:footnoteReference', namespaces)
-        if footnote_ref is not None:
-            ref_id = footnote_ref.get('{http://schemas.openxmlformats.org/wordprocessingml/2006/main}id')
-            if ref_id:
-                run_text += f"[{ref_id}]"
+        if ref_id:
+            run_text += f"[{ref_id}]"
         
-        # Apply formatting tags if any
+        # Apply formatting tags if any, in one concatenation; the last marker is outermost
         if formatting_tags:
-            for tag in formatting_tags:
-                run_text = f"{tag}{run_text}</{tag[1:]}"
+            opening = ''.join([open_tag for open_tag, _ in reversed(formatting_tags)])
+            closing = ''.join([close_tag for _, close_tag in formatting_tags])
+            run_text = f"{opening}{run_text}{closing}"
         
         if run_text:
             text_parts.append(run_text)
@@ -3,11 +3,16 @@ Experimental Reasoning-Based Citation Checker
 Bypasses base citation extraction and sends anchored text directly to reasoning model
 """
 import json
+import logging
 import sys
 import re
+import asyncio
+import io
+import time
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Union
+from typing import Dict, List, Optional, Any, Union, Iterator, Tuple
 from enum import Enum
+from itertools import accumulate
 
 # Add parent directory to path to import from core and config folders
 sys.path.append(str(Path(__file__).parent.parent))
@@ -15,8 +20,149 @@ sys.path.append(str(Path(__file__).parent.parent))
 from config.config import config, LLMProvider
 from llm.llm_client import LLMClient, LLMClientFactory
 from llm.token_estimator import TokenEstimator
+from llm.rate_limiter import AsyncTokenBucket, retry_wait
+from llm.response_cache import ResponseCache
 from utils.metadata_manager import MetadataManager
 
+# Per-batch progress and debug detail; handlers and level are set up by main()
+logger = logging.getLogger(__name__)
+
+# Attempts per batch request on rate limits / transient API errors, and the backoff cap
+MAX_BATCH_ATTEMPTS = 6
+MAX_RETRY_WAIT = 60.0
+
+# Estimated prompt + text tokens above which a document is split into batches
+MAX_DOCUMENT_TOKENS = 100000  # Much higher limit for gpt-4o-2024-08-06 (128K context)
+
+# Estimated prompt + text tokens packed into each batch; kept well below the context
+# limit because dense citation text produces long responses (capped at 16k tokens)
+BATCH_TOKEN_BUDGET = 24000
+
+# Paragraph anchor tokens inserted by xml_to_anchored_txt
+ANCHOR_RE = re.compile(r'⟦P-\d+⟧')
+
+# Decodes one JSON value starting at a given index, ignoring whatever follows it
+_JSON_DECODER = json.JSONDecoder()
+
+# Instructions shared by every request. They are sent first, as a system message,
+# and must stay byte-for-byte identical between requests (no processing IDs or
+# timestamps) so OpenAI's prompt cache can serve them; caching only applies to
+# prefixes of at least 1024 tokens, which the worked examples below ensure.
+EXPERIMENTAL_SYSTEM_PROMPT = """You are a legal citation expert specializing in Bluebook citation format. Analyze the legal text in the user message for legal citations and return them in JSON format.
+
+## METHOD
+1. Examine each paragraph (marked by ⟦P-#####⟧ anchors) individually; do not skip any.
+2. Identify every legal citation in the paragraph, including short forms ("Id. at 5", "Smith, 123 U.S. at 460").
+3. Check each citation against the Bluebook and decide whether it is correct.
+4. Return one JSON entry per citation found. Paragraphs without citations produce no entries.
+
+## CITATION TYPES TO FIND
+- Case citations (e.g., "Smith v. Jones, 123 U.S. 456 (2020)")
+- Statutory citations (e.g., "42 U.S.C. § 1983")
+- Session laws (e.g., "Pub. L. No. 117-103, § 802, 136 Stat. 49, 120 (2022)")
+- Regulatory citations (e.g., "28 C.F.R. § 35.104")
+- Constitutional citations (e.g., "U.S. Const. art. I, § 8")
+- Court rules (e.g., "Fed. R. Civ. P. 12(b)(6)")
+- Secondary sources (e.g., "Restatement (Second) of Torts § 402A (1965)")
+- Court documents (e.g., "Def.'s Mot. Dismiss 4, ECF No. 12")
+
+## NOT CITATIONS (DO NOT INCLUDE)
+- Document headers such as "UNITED STATES DISTRICT COURT" or "DISTRICT OF MINNESOTA"
+- Docket numbers in the caption (e.g., "Case No. 24-cr-118")
+- Party designations and plain text ("Defendant", "Plaintiff")
+- Empty paragraphs, spacing, document titles or formatting
+
+## FIELDS
+- "anchor": the anchor that immediately precedes the citation, without brackets (e.g., "P-00042")
+- "start_offset": number of characters from the end of the anchor to the citation's first character
+- "end_offset": offset of the first character AFTER the citation
+- "type": one of case, statute-code, session-law, regulation, constitution, rule/procedure, legislative-material, administrative-decision, book, periodical, internet, court-document, other
+- "status": "Correct", "Error" or "Uncertain"
+- "errors": concise rule-labelled errors (e.g., "Rule 10.1.2 – missing pincite"); empty when correct
+- "orig": the citation exactly as it appears in the text, including any formatting tags
+- "suggested": the corrected citation, identical to orig when no change is required
+
+## FORMATTING TAGS
+The text may contain inline formatting tags: <italic>, <bold>, <underline>, <smallcaps> and <superscript> (footnote numbers). Treat them as part of the citation: case names and signals should be italicized, while reporters, codes, section symbols and dates stay roman. Offsets count the tag characters too.
+
+## COMMON BLUEBOOK ERRORS TO FLAG
+- Case name or signal not italicized (B2)
+- Incorrect reporter, court or geographic abbreviations (Tables T1, T6, T7, T10)
+- Missing or incorrect year or court parenthetical (Rule 10.4, 10.5)
+- Missing pinpoint citation (Rule 3.2)
+- Incorrect section symbol spacing, e.g. "§1983" instead of "§ 1983" (Rule 6.2)
+- "Id." used when the preceding citation is to a different authority (Rule 4.1)
+- Supra used for cases, statutes, constitutions or regulations (Rule 4.2)
+
+## EXAMPLES
+Text: ⟦P-00007⟧This matter comes before the Court pursuant to 28 U.S.C. § 636, and upon the Government's Motion.
+Entry: {"anchor": "P-00007", "start_offset": 47, "end_offset": 62, "type": "statute-code", "status": "Correct", "errors": [], "orig": "28 U.S.C. § 636", "suggested": "28 U.S.C. § 636"}
+
+Text: ⟦P-00012⟧Defendant filed her notice pursuant to Fed. R. Crim P. 12.2(a).
+Entry: {"anchor": "P-00012", "start_offset": 39, "end_offset": 62, "type": "rule/procedure", "status": "Error", "errors": ["Rule 12.9.3 – Criminal is abbreviated Crim."], "orig": "Fed. R. Crim P. 12.2(a)", "suggested": "Fed. R. Crim. P. 12.2(a)"}
+
+Text: ⟦P-00019⟧<italic>See</italic> <italic>Brown v. Board of Education</italic>, 347 U.S. 483 (1954).
+Entry: {"anchor": "P-00019", "start_offset": 0, "end_offset": 86, "type": "case", "status": "Error", "errors": ["Rule 3.2 – missing pincite"], "orig": "<italic>See</italic> <italic>Brown v. Board of Education</italic>, 347 U.S. 483 (1954)", "suggested": "<italic>See</italic> <italic>Brown v. Board of Education</italic>, 347 U.S. 483, 495 (1954)"}
+
+Text: ⟦P-00023⟧Congress has power to regulate commerce. U.S. Const. art. I, § 8, cl. 3.
+Entry: {"anchor": "P-00023", "start_offset": 41, "end_offset": 71, "type": "constitution", "status": "Correct", "errors": [], "orig": "U.S. Const. art. I, § 8, cl. 3", "suggested": "U.S. Const. art. I, § 8, cl. 3"}
+
+Text: ⟦P-00031⟧The agency's rule applies. 28 C.F.R. §35.104.
+Entry: {"anchor": "P-00031", "start_offset": 27, "end_offset": 44, "type": "regulation", "status": "Error", "errors": ["Rule 6.2 – space required after §", "Rule 14.2 – missing year of C.F.R."], "orig": "28 C.F.R. §35.104", "suggested": "28 C.F.R. § 35.104 (2020)"}
+
+Text: ⟦P-00002⟧UNITED STATES DISTRICT COURT
+Entry: none (document header, not a citation)
+
+## OUTPUT
+Return an object whose "citations" array holds one entry per citation found, in document order.
+
+## RULES
+- Look for any legal citations in every paragraph
+- If no citations found, return an empty "citations" array
+- Be thorough but only include actual legal citations"""
+
+CITATION_TYPES = [
+    "case", "statute-code", "session-law", "regulation", "constitution", "rule/procedure",
+    "legislative-material", "administrative-decision", "book", "periodical", "internet",
+    "court-document", "other"
+]
+
+# Structured Outputs schema: the model's reply is guaranteed to be a JSON object
+# of this shape, so no markdown fences or surrounding text need to be stripped
+CITATION_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "citations",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "citations": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "anchor": {"type": "string"},
+                            "start_offset": {"type": "integer"},
+                            "end_offset": {"type": "integer"},
+                            "type": {"type": "string", "enum": CITATION_TYPES},
+                            "status": {"type": "string", "enum": ["Correct", "Error", "Uncertain"]},
+                            "errors": {"type": "array", "items": {"type": "string"}},
+                            "orig": {"type": "string"},
+                            "suggested": {"type": "string"}
+                        },
+                        "required": ["anchor", "start_offset", "end_offset", "type", "status",
+                                     "errors", "orig", "suggested"],
+                        "additionalProperties": False
+                    }
+                }
+            },
+            "required": ["citations"],
+            "additionalProperties": False
+        }
+    }
+}
+
 class ReasoningEffort(Enum):
     """Reasoning effort levels for OpenAI reasoning models"""
     LOW = "low"
@@ -26,14 +172,21 @@ class ReasoningEffort(Enum):
 class ExperimentalReasoningCitationChecker:
     """Experimental citation checker that uses reasoning models directly"""
     
-    def __init__(self, api_key: Optional[str] = None, model: str = "gpt-4o-2024-08-06"):
+    def __init__(self, api_key: Optional[str] = None, model: str = "gpt-4o-2024-08-06", max_concurrency: int = 8):
         self.api_key = api_key or config.get_api_key(LLMProvider.OPENAI)
         self.model = model
+        self.max_concurrency = max_concurrency
         self.client = None
+        self._retryable_errors = ()
+        rpm = config.requests_per_minute.get(LLMProvider.OPENAI)
+        self.rate_limiter = AsyncTokenBucket(rpm) if rpm else None
         self.token_estimator = TokenEstimator()
+        # The prompt is fixed, so its token estimate is computed once per checker
+        self._prompt_tokens = self.token_estimator.estimate_tokens(self._load_legal_citation_prompt())
         self.working_dir = Path.cwd()
         self.metadata_manager = MetadataManager(self.working_dir)
         self.default_effort = ReasoningEffort.HIGH
+        self.response_cache = ResponseCache()
         
         if not self.api_key:
             print("❌ OpenAI API key required for reasoning models")
@@ -41,8 +194,11 @@ class ExperimentalReasoningCitationChecker:
         
         # Initialize OpenAI client for reasoning models
         try:
-            from openai import OpenAI
+            from openai import OpenAI, AsyncOpenAI, RateLimitError, APIConnectionError, InternalServerError
             self.client = OpenAI(api_key=self.api_key)
+            self._async_client_class = AsyncOpenAI
+            # APITimeoutError is a subclass of APIConnectionError
+            self._retryable_errors = (RateLimitError, APIConnectionError, InternalServerError)
             print(f"✅ Experimental reasoning checker initialized with model: {model}")
         except ImportError:
             print("❌ OpenAI SDK not installed. Please install with: pip install openai")
@@ -55,8 +211,10 @@ class ExperimentalReasoningCitationChecker:
         output_file: Optional[str] = None,
         effort: ReasoningEffort = ReasoningEffort.HIGH,
         debug: bool = False,
-        batch_size: int = 10,
-        context_overlap: int = 2
+        batch_size: Optional[int] = None,
+        context_overlap: int = 2,
+        use_batch_api: bool = False,
+        batch_id: Optional[str] = None
     ) -> Optional[Dict[str, Any]]:
         """
         Check citations directly using reasoning model without base extraction
@@ -66,8 +224,12 @@ class ExperimentalReasoningCitationChecker:
             output_file: Optional output file path
             effort: Reasoning effort level
             debug: Enable debug output
-            batch_size: Number of citations to process per batch
+            batch_size: Optional maximum number of paragraphs per batch (batches are
+                otherwise packed up to BATCH_TOKEN_BUDGET tokens)
             context_overlap: Number of overlapping citations between batches
+            use_batch_api: Submit oversized documents through the OpenAI Batch API
+                (half price, may take up to 24 hours)
+            batch_id: Resume waiting on a Batch API job submitted by an earlier run
             
         Returns:
             Dictionary with citation analysis results
@@ -90,17 +252,22 @@ class ExperimentalReasoningCitationChecker:
             print("❌ Failed to load legal citation prompt")
             return None
         
+        # Check if batching is needed (the text is estimated once and reused below)
+        text_tokens = self.token_estimator.estimate_tokens(anchored_text)
+        total_tokens = text_tokens + self._prompt_tokens
+        max_tokens = MAX_DOCUMENT_TOKENS
+        
         # Analyze token usage
         if debug:
-            self._analyze_token_usage(anchored_text, prompt_template)
-        
-        # Check if batching is needed
-        text_tokens = self.token_estimator.estimate_tokens(anchored_text)
-        prompt_tokens = self.token_estimator.estimate_tokens(prompt_template)
-        total_tokens = text_tokens + prompt_tokens
-        max_tokens = 100000  # Much higher limit for gpt-4o-2024-08-06 (128K context)
+            self._analyze_token_usage(text_tokens, self._prompt_tokens)
         
-        if total_tokens > max_tokens:
+        if batch_id or (use_batch_api and total_tokens > max_tokens):
+            print(f"📦 Text requires batching (total tokens: {total_tokens:,}), using the Batch API")
+            return self._process_batch_api_direct_check(
+                anchored_text, prompt_template, output_file, effort, debug,
+                batch_size, metadata, batch_id
+            )
+        elif total_tokens > max_tokens:
             print(f"📦 Text requires batching (total tokens: {total_tokens:,})")
             return self._process_batched_direct_check(
                 anchored_text, prompt_template, output_file, effort, debug, 
@@ -114,47 +281,12 @@ class ExperimentalReasoningCitationChecker:
     
     def _load_legal_citation_prompt(self) -> Optional[str]:
         """Load the legal citation prompt template"""
-        # Use a much shorter, focused prompt for experimental reasoning
-        short_prompt = """You are a legal citation expert. Analyze the provided text for legal citations and return them in JSON format.
-
-CITATION TYPES TO FIND:
-- Case citations (e.g., "Smith v. Jones, 123 U.S. 456 (2020)")
-- Statutory citations (e.g., "42 U.S.C. § 1983")
-- Regulatory citations (e.g., "28 C.F.R. § 35.104")
-- Constitutional citations (e.g., "U.S. Const. art. I, § 8")
-- Court rules (e.g., "Fed. R. Civ. P. 12(b)(6)")
-
-OUTPUT FORMAT:
-Return a JSON array with each citation found:
-```json
-[
-  {
-    "anchor": "P-00042",
-    "start_offset": 12,
-    "end_offset": 31,
-    "type": "case",
-    "status": "Correct",
-    "errors": [],
-    "orig": "Roe v. Wade, 410 U.S. 113 (1973)",
-    "suggested": "Roe v. Wade, 410 U.S. 113 (1973)"
-  }
-]
-```
-
-RULES:
-- Examine each paragraph (marked by ⟦P-#####⟧ anchors)
-- Look for any legal citations in the text
-- If no citations found, return []
-- Be thorough but only include actual legal citations"""
-        
-        return short_prompt
+        return EXPERIMENTAL_SYSTEM_PROMPT
     
-    def _analyze_token_usage(self, text: str, prompt: str):
-        """Analyze and display token usage information"""
-        text_tokens = self.token_estimator.estimate_tokens(text)
-        prompt_tokens = self.token_estimator.estimate_tokens(prompt)
+    def _analyze_token_usage(self, text_tokens: int, prompt_tokens: int):
+        """Display token usage information for already-estimated text and prompt"""
         total_tokens = text_tokens + prompt_tokens
-        max_tokens = 100000  # Much higher limit for gpt-4o-2024-08-06
+        max_tokens = MAX_DOCUMENT_TOKENS
         
         print("\n🔍 TOKEN ANALYSIS DEBUG INFO")
         print("=" * 50)
@@ -186,51 +318,38 @@ RULES:
             print("❌ No OpenAI client available for reasoning model")
             return None
         
-        # Create the full prompt
-        full_prompt = f"{prompt_template}\n\n## DOCUMENT TEXT TO ANALYZE\n\n{anchored_text}"
-        
-        if debug:
-            print(f"📤 Sending {len(anchored_text):,} characters to reasoning model...")
-        
         try:
-            # Call OpenAI API (regular chat completion, not reasoning API)
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": full_prompt
-                    }
-                ],
-                max_tokens=16000,  # Higher output limit for gpt-4o-2024-08-06
-                temperature=0.1  # Low temperature for consistent results
-            )
-            
-            if not response.choices or not response.choices[0].message.content:
-                print("❌ No output from model")
-                return None
-            
-            response_text = response.choices[0].message.content
+            request = self._build_chat_request(anchored_text, prompt_template)
+            cache_key = self._citation_cache_key(request)
+            citations = self._get_cached_citations(cache_key)
             
-            # Save raw output
-            raw_output_file = self.metadata_manager.create_output_filename(
-                "experimental_reasoning", metadata["processing_id"], "raw", ".txt"
-            )
-            with open(raw_output_file, 'w', encoding='utf-8') as f:
-                f.write(response_text)
-            
-            if debug:
-                print(f"💾 Raw reasoning output saved to: {raw_output_file}")
-                print(f"📄 Full response length: {len(response_text):,} characters")
-                print(f"📄 Response preview: {response_text[:200]}...")
-                print(f"📄 Response ending: ...{response_text[-200:]}")
-            
-            # Parse the response
-            citations = self._parse_reasoning_response(response_text, debug)
-            
-            if citations is None:
-                print("❌ Failed to parse reasoning response")
-                return None
+            if citations is not None:
+                print("💾 Using cached citation results")
+            else:
+                logger.debug("📤 Sending %s characters to reasoning model...", f"{len(anchored_text):,}")
+                
+                # Call OpenAI API (regular chat completion, not reasoning API)
+                response = self.client.chat.completions.create(**request)
+                
+                self._report_prompt_cache(getattr(response, "usage", None), debug)
+                response_text = self._response_text(response)
+                if not response_text:
+                    print("❌ No output from model")
+                    return None
+                
+                self._save_raw_output(response_text, metadata, debug)
+                
+                if response.choices[0].finish_reason == "length":
+                    print("❌ Response hit the output token limit and is incomplete")
+                    return None
+                
+                # Parse the response
+                citations = self._parse_reasoning_response(response_text, debug)
+                
+                if citations is None:
+                    print("❌ Failed to parse reasoning response")
+                    return None
+                self.response_cache.set(cache_key, json.dumps(citations))
             
             # Create results
             results = {
@@ -271,40 +390,165 @@ RULES:
         output_file: Optional[str],
         effort: ReasoningEffort,
         debug: bool,
-        batch_size: int,
+        batch_size: Optional[int],
         context_overlap: int,
         metadata: Dict[str, Any]
     ) -> Optional[Dict[str, Any]]:
-        """Process text in batches using reasoning model"""
+        """Process text in batches using reasoning model, sending the batches concurrently"""
+        batches = self._build_batches(anchored_text, batch_size, debug)
         
-        # Split text into paragraphs
-        paragraphs = self._split_into_paragraphs(anchored_text)
+        batch_citations = asyncio.run(self._check_batches_async(batches, prompt_template, debug, metadata))
+        return self._combine_batch_results(
+            batch_citations, output_file, effort, metadata, "experimental_reasoning_batched"
+        )
+    
+    def _process_batch_api_direct_check(
+        self,
+        anchored_text: str,
+        prompt_template: str,
+        output_file: Optional[str],
+        effort: ReasoningEffort,
+        debug: bool,
+        batch_size: Optional[int],
+        metadata: Dict[str, Any],
+        batch_id: Optional[str] = None,
+        poll_interval: int = 30
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Process text in batches through the OpenAI Batch API
         
-        if debug:
-            print(f"📦 Text split into {len(paragraphs)} paragraphs")
-            print(f"📦 Processing in batches of {batch_size} paragraphs")
+        Batch jobs are billed at half price and are not subject to the real-time
+        rate limits, but can take up to 24 hours. The batch ID is saved in the
+        metadata as soon as the job is submitted, so an interrupted run can be
+        resumed by passing it back as batch_id.
+        """
+        batches = self._build_batches(anchored_text, batch_size, debug)
+        requests = [self._build_chat_request(batch_text, prompt_template) for batch_text in batches]
+        cache_keys = [self._citation_cache_key(request) for request in requests]
         
-        all_citations = []
-        batch_count = (len(paragraphs) + batch_size - 1) // batch_size
+        # Batches answered by an earlier run are filled in from the cache and not submitted
+        batch_citations = [self._get_cached_citations(cache_key) for cache_key in cache_keys]
+        pending = [batch_num for batch_num, citations in enumerate(batch_citations) if citations is None]
+        if not pending:
+            print("✅ All batches answered from the response cache")
+            return self._combine_batch_results(
+                batch_citations, output_file, effort, metadata, "experimental_reasoning_batch_api"
+            )
         
-        for batch_num in range(batch_count):
-            start_idx = batch_num * batch_size
-            end_idx = min(start_idx + batch_size, len(paragraphs))
-            
-            # Get batch paragraphs
-            batch_paragraphs = paragraphs[start_idx:end_idx]
-            batch_text = "\n\n".join(batch_paragraphs)
-            
-            if debug:
-                print(f"📦 Processing batch {batch_num + 1}/{batch_count} ({len(batch_paragraphs)} paragraphs)")
+        if batch_id:
+            print(f"♻️  Resuming Batch API job: {batch_id}")
+            batch = self.client.batches.retrieve(batch_id)
+        else:
+            # Encode each JSONL line straight into the upload buffer, so the
+            # document is held once more as bytes rather than as lines, joined text and bytes
+            batch_jsonl = io.BytesIO()
+            for batch_num in pending:
+                line = json.dumps({
+                    "custom_id": f"batch-{batch_num}",
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": requests[batch_num]
+                }, ensure_ascii=False)
+                batch_jsonl.write(line.encode('utf-8'))
+                batch_jsonl.write(b"\n")
+            batch_jsonl.seek(0)
             
-            # Process this batch
-            batch_results = self._process_single_batch_direct_check(
-                batch_text, prompt_template, None, effort, debug, metadata
+            print(f"📤 Submitting {len(pending)} of {len(batches)} batches to the Batch API...")
+            batch_file = self.client.files.create(
+                file=("experimental_reasoning_batch.jsonl", batch_jsonl),
+                purpose="batch"
+            )
+            batch = self.client.batches.create(
+                input_file_id=batch_file.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h"
             )
+            print(f"🆔 Batch ID: {batch.id}")
+            metadata["batch_api"] = {"batch_id": batch.id, "input_file_id": batch_file.id}
+            self.metadata_manager.save_metadata(metadata)
+        
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            logger.debug("   ⏳ Batch status: %s", batch.status)
+            time.sleep(poll_interval)
+            batch = self.client.batches.retrieve(batch.id)
+        
+        if batch.status != "completed" or not batch.output_file_id:
+            print(f"❌ Batch ended with status: {batch.status}")
+            return None
+        
+        # Output lines are not in submission order; custom_id gives each line's batch
+        output = self.client.files.content(batch.output_file_id).text
+        for line in output.splitlines():
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            batch_num = int(record["custom_id"].split("-", 1)[1])
+            response = record.get("response") or {}
+            choices = (response.get("body") or {}).get("choices") or []
+            response_text = choices[0].get("message", {}).get("content") if choices else None
+            if response.get("status_code") != 200 or not response_text or not 0 <= batch_num < len(batches):
+                logger.warning("⚠️  No usable output for batch %d", batch_num + 1)
+                continue
             
-            if batch_results and batch_results.get('citations'):
-                all_citations.extend(batch_results['citations'])
+            self._save_raw_output(response_text, metadata, debug, f"raw_batch{batch_num + 1}")
+            if choices[0].get("finish_reason") == "length":
+                logger.error("❌ Response for batch %d hit the output token limit and is incomplete", batch_num + 1)
+                continue
+            batch_citations[batch_num] = self._parse_reasoning_response(response_text, debug)
+            if batch_citations[batch_num] is not None:
+                self.response_cache.set(cache_keys[batch_num], json.dumps(batch_citations[batch_num]))
+        
+        return self._combine_batch_results(
+            batch_citations, output_file, effort, metadata, "experimental_reasoning_batch_api"
+        )
+    
+    def _build_batches(self, anchored_text: str, batch_size: Optional[int], debug: bool) -> List[str]:
+        """
+        Greedily pack consecutive paragraphs into batches of up to BATCH_TOKEN_BUDGET
+        tokens (prompt included), and at most batch_size paragraphs if given
+        
+        A paragraph that alone exceeds the budget gets a batch of its own.
+        """
+        # Paragraphs are kept as spans; only the finished batches are copied out of the text
+        paragraphs = list(self._iter_paragraph_spans(anchored_text))
+        
+        # Each paragraph is estimated once; prefix[j] - prefix[i] is the size of paragraphs[i:j]
+        prefix = list(accumulate(
+            (self.token_estimator.estimate_tokens(anchored_text[p_start:p_end]) for p_start, p_end in paragraphs),
+            initial=0
+        ))
+        text_budget = BATCH_TOKEN_BUDGET - self._prompt_tokens
+        max_paragraphs = batch_size or len(paragraphs)
+        
+        batches = []
+        start = 0
+        while start < len(paragraphs):
+            end = start + 1
+            while (end < len(paragraphs) and end - start < max_paragraphs
+                   and prefix[end + 1] - prefix[start] <= text_budget):
+                end += 1
+            # Consecutive paragraphs are one contiguous slice, separators included
+            batches.append(anchored_text[paragraphs[start][0]:paragraphs[end - 1][1]])
+            start = end
+        
+        logger.debug("📦 Text split into %d paragraphs", len(paragraphs))
+        logger.debug("📦 Packed into %d batches of up to %s tokens", len(batches), f"{BATCH_TOKEN_BUDGET:,}")
+        
+        return batches
+    
+    def _combine_batch_results(
+        self,
+        batch_citations: List[Optional[List[Dict[str, Any]]]],
+        output_file: Optional[str],
+        effort: ReasoningEffort,
+        metadata: Dict[str, Any],
+        processing_mode: str
+    ) -> Optional[Dict[str, Any]]:
+        """Merge per-batch citations (in batch order) into one results dict and save it"""
+        all_citations = []
+        for citations in batch_citations:
+            if citations:
+                all_citations.extend(citations)
         
         # Combine results
         if all_citations:
@@ -314,10 +558,10 @@ RULES:
                 "errors": sum(1 for c in all_citations if c.get('status') == 'Error'),
                 "correct": sum(1 for c in all_citations if c.get('status') == 'Correct'),
                 "uncertain": sum(1 for c in all_citations if c.get('status') == 'Uncertain'),
-                "processing_mode": "experimental_reasoning_batched",
+                "processing_mode": processing_mode,
                 "model_used": self.model,
                 "reasoning_effort": effort.value,
-                "batches_processed": batch_count,
+                "batches_processed": len(batch_citations),
                 "metadata": metadata
             }
             
@@ -327,57 +571,260 @@ RULES:
                     json.dump(results, f, indent=2, ensure_ascii=False)
                 print(f"💾 Results saved to: {output_file}")
             
+            # Update metadata
+            metadata = self.metadata_manager.add_pipeline_step(
+                metadata, "experimental_reasoning_check", 
+                "anchored_text", output_file, "completed"
+            )
+            self.metadata_manager.save_metadata(metadata)
+            
             return results
         else:
             print("❌ No citations found in any batch")
             return None
     
-    def _split_into_paragraphs(self, text: str) -> List[str]:
-        """Split anchored text into paragraphs"""
-        # Split by double newlines to get paragraphs
-        paragraphs = [p.strip() for p in text.split('\n\n') if p.strip()]
-        return paragraphs
+    async def _check_batches_async(
+        self,
+        batches: List[str],
+        prompt_template: str,
+        debug: bool,
+        metadata: Dict[str, Any]
+    ) -> List[Optional[List[Dict[str, Any]]]]:
+        """
+        Check all batches concurrently, with at most max_concurrency requests in flight
+        
+        Returns:
+            Each batch's citations in batch order (None for a failed batch)
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        # The async client's connection pool is tied to the running event loop,
+        # so create it per run rather than once per checker
+        # (SDK retries are disabled; _create_with_retry handles backoff itself)
+        async with self._async_client_class(api_key=self.api_key, max_retries=0) as aclient:
+            async def check(batch_num: int, batch_text: str) -> Optional[List[Dict[str, Any]]]:
+                async with semaphore:
+                    logger.debug("📦 Processing batch %d/%d (%d characters)", batch_num + 1, len(batches), len(batch_text))
+                    return await self._process_single_batch_async(
+                        aclient, batch_text, prompt_template, debug, metadata, batch_num
+                    )
+            
+            results = await asyncio.gather(
+                *[check(batch_num, batch_text) for batch_num, batch_text in enumerate(batches)],
+                return_exceptions=True
+            )
+        
+        batch_citations = []
+        for batch_num, result in enumerate(results):
+            if isinstance(result, Exception):
+                logger.error("❌ Batch %d failed: %s", batch_num + 1, result)
+                batch_citations.append(None)
+            else:
+                batch_citations.append(result)
+        return batch_citations
+    
+    async def _process_single_batch_async(
+        self,
+        aclient: Any,
+        batch_text: str,
+        prompt_template: str,
+        debug: bool,
+        metadata: Dict[str, Any],
+        batch_num: int
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Send one batch to the model and parse its citations"""
+        request = self._build_chat_request(batch_text, prompt_template)
+        cache_key = self._citation_cache_key(request)
+        citations = self._get_cached_citations(cache_key)
+        if citations is not None:
+            logger.debug("💾 Using cached citation results for batch %d", batch_num + 1)
+            return citations
+        
+        response_text, finish_reason, usage = await self._stream_with_retry(aclient, request)
+        self._report_prompt_cache(usage, debug)
+        
+        if not response_text:
+            logger.error("❌ No output from model for batch %d", batch_num + 1)
+            return None
+        
+        # Batches finish within the same second, so each raw output gets its own name
+        self._save_raw_output(response_text, metadata, debug, f"raw_batch{batch_num + 1}")
+        
+        # A cut-off response is missing citations, so it fails the batch and is never cached
+        if finish_reason == "length":
+            logger.error("❌ Response for batch %d hit the output token limit and is incomplete", batch_num + 1)
+            return None
+        
+        citations = self._parse_reasoning_response(response_text, debug)
+        if citations is None:
+            logger.error("❌ Failed to parse reasoning response for batch %d", batch_num + 1)
+        else:
+            self.response_cache.set(cache_key, json.dumps(citations))
+        return citations
+    
+    async def _stream_with_retry(self, aclient: Any, request: Dict[str, Any]) -> tuple:
+        """
+        Stream a Chat Completions response, backing off on rate limits and transient errors
+        
+        The response is read as it is generated, so the connection never sits idle
+        through a long completion; a stream dropped part-way is retried as a whole.
+        
+        Returns:
+            (response_text, finish_reason, usage)
+        """
+        for attempt in range(MAX_BATCH_ATTEMPTS):
+            if self.rate_limiter:
+                await self.rate_limiter.acquire()
+            try:
+                stream = await aclient.chat.completions.create(
+                    **request, stream=True, stream_options={"include_usage": True}
+                )
+                parts = []
+                finish_reason = None
+                usage = None
+                async for chunk in stream:
+                    if chunk.usage:
+                        usage = chunk.usage  # Sent in a final chunk with no choices
+                    if chunk.choices:
+                        choice = chunk.choices[0]
+                        if choice.delta.content:
+                            parts.append(choice.delta.content)
+                        finish_reason = choice.finish_reason or finish_reason
+                return ''.join(parts), finish_reason, usage
+            except self._retryable_errors as e:
+                if attempt == MAX_BATCH_ATTEMPTS - 1:
+                    raise
+                if self.rate_limiter:
+                    self.rate_limiter.update_from_headers(getattr(getattr(e, "response", None), "headers", None))
+                wait_time = retry_wait(e, attempt, MAX_RETRY_WAIT)
+                logger.warning("⏳ %s, retrying in %.1f seconds...", type(e).__name__, wait_time)
+                await asyncio.sleep(wait_time)
+    
+    def _citation_cache_key(self, request: Dict[str, Any]) -> str:
+        """Cache key for a batch's citations: a hash of the whole request (model, settings, prompt and text)"""
+        return ResponseCache.make_key("experimental_reasoning", json.dumps(request, sort_keys=True))
+    
+    def _get_cached_citations(self, cache_key: str) -> Optional[List[Dict[str, Any]]]:
+        """Get a batch's cached citations, or None"""
+        cached = self.response_cache.get(cache_key)
+        return json.loads(cached) if cached is not None else None
+    
+    def _build_chat_request(self, anchored_text: str, prompt_template: str) -> Dict[str, Any]:
+        """Chat Completions request for one piece of anchored text"""
+        # Static instructions first, as their own message, so every request
+        # shares the same cacheable prefix; only the user message varies
+        return {
+            "model": self.model,
+            "messages": [
+                {
+                    "role": "system",
+                    "content": prompt_template
+                },
+                {
+                    "role": "user",
+                    "content": anchored_text
+                }
+            ],
+            "response_format": CITATION_RESPONSE_FORMAT,
+            "max_tokens": 16000,  # Higher output limit for gpt-4o-2024-08-06
+            "temperature": 0.1  # Low temperature for consistent results
+        }
+    
+    def _report_prompt_cache(self, usage: Any, debug: bool):
+        """Log how many input tokens were served from OpenAI's prompt cache"""
+        details = getattr(usage, "prompt_tokens_details", None)
+        if details is not None:
+            logger.debug("💾 Prompt cache: %s/%s input tokens cached", details.cached_tokens or 0, usage.prompt_tokens)
+    
+    def _response_text(self, response: Any) -> Optional[str]:
+        """Message content of a chat completion, or None if the model returned nothing"""
+        if not response.choices or not response.choices[0].message.content:
+            return None
+        return response.choices[0].message.content
+    
+    def _save_raw_output(self, response_text: str, metadata: Dict[str, Any], debug: bool,
+                         output_type: str = "raw") -> str:
+        """Save the model's raw output next to the other processing artifacts"""
+        raw_output_file = self.metadata_manager.create_output_filename(
+            "experimental_reasoning", metadata["processing_id"], output_type, ".txt"
+        )
+        with open(raw_output_file, 'w', encoding='utf-8') as f:
+            f.write(response_text)
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("💾 Raw reasoning output saved to: %s", raw_output_file)
+            logger.debug("📄 Full response length: %s characters", f"{len(response_text):,}")
+            logger.debug("📄 Response preview: %s...", response_text[:200])
+            logger.debug("📄 Response ending: ...%s", response_text[-200:])
+        return raw_output_file
+    
+    def _iter_paragraph_spans(self, text: str) -> Iterator[Tuple[int, int]]:
+        """
+        Yield the (start, end) span of each non-blank paragraph in anchored text
+        
+        Paragraphs start at their ⟦P-#####⟧ anchors (any text before the first
+        anchor is a paragraph of its own); surrounding whitespace is left out.
+        """
+        starts = [match.start() for match in ANCHOR_RE.finditer(text)]
+        if not starts or starts[0] > 0:
+            starts.insert(0, 0)
+        starts.append(len(text))
+        
+        for start, end in zip(starts, starts[1:]):
+            while start < end and text[start].isspace():
+                start += 1
+            while end > start and text[end - 1].isspace():
+                end -= 1
+            if start < end:
+                yield start, end
     
     def _parse_reasoning_response(self, response_text: str, debug: bool = False) -> Optional[List[Dict[str, Any]]]:
-        """Parse the reasoning model response to extract citations"""
+        """
+        Parse the reasoning model response to extract citations
+        
+        Structured outputs arrive as a {"citations": [...]} object. Anything else
+        (e.g. a raw output saved before structured outputs, or a model without
+        them) is scanned for the first non-empty JSON array of citation objects,
+        fenced or not: each '[' is tried in turn with a single decode from that
+        position. An empty array only counts when it is the whole response, since
+        a truncated reply still contains inner arrays such as "errors": [].
+        """
         try:
-            # First try to find JSON array in markdown code blocks
-            json_match = re.search(r'```json\s*(\[.*?\])\s*```', response_text, re.DOTALL)
-            if json_match:
-                json_str = json_match.group(1)
-            else:
-                # Try to find JSON array without markdown - be more specific
-                # Look for array that starts with [ and ends with ] and contains citation objects
-                json_match = re.search(r'\[\s*\{[^[]*\}\s*(?:,\s*\{[^[]*\}\s*)*\]', response_text, re.DOTALL)
-                if json_match:
-                    json_str = json_match.group(0)
-                else:
-                    # Last resort: try to find any array that might be JSON
-                    json_match = re.search(r'\[.*?\]', response_text, re.DOTALL)
-                    if json_match:
-                        json_str = json_match.group(0)
-                    else:
-                        if debug:
-                            print("❌ No JSON array found in response")
-                        return None
-            
-            # Parse JSON
-            citations = json.loads(json_str)
-            
-            if debug:
-                print(f"✅ Successfully parsed {len(citations)} citations from reasoning response")
-            
+            citations = json.loads(response_text)["citations"]
+            logger.debug("✅ Successfully parsed %d citations from reasoning response", len(citations))
             return citations
-            
-        except json.JSONDecodeError as e:
-            if debug:
-                print(f"❌ JSON parsing error: {e}")
-                print(f"📄 Raw JSON string: {json_str[:200]}...")
-            return None
-        except Exception as e:
-            if debug:
-                print(f"❌ Response parsing error: {e}")
+        except (json.JSONDecodeError, TypeError, KeyError) as e:
+            error = e
+        
+        body = response_text.strip().removeprefix("```json").removeprefix("```").removesuffix("```").strip()
+        if body.startswith('{'):
+            # A structured output that does not decode was cut off; its inner arrays are not the result
+            logger.debug("❌ Incomplete structured response: %s", error)
             return None
+        if body == '[]':
+            logger.debug("✅ Reasoning response contains no citations")
+            return []
+        
+        error = None
+        start = response_text.find('[')
+        while start != -1:
+            try:
+                citations, _ = _JSON_DECODER.raw_decode(response_text, start)
+            except json.JSONDecodeError as e:
+                error = e
+            else:
+                if (isinstance(citations, list) and citations
+                        and all(isinstance(c, dict) and 'anchor' in c for c in citations)):
+                    logger.debug("✅ Successfully parsed %d citations from reasoning response", len(citations))
+                    return citations
+            start = response_text.find('[', start + 1)
+        
+        if error:
+            logger.debug("❌ JSON parsing error: %s", error)
+            logger.debug("📄 Raw response: %s...", response_text[:200])
+        else:
+            logger.debug("❌ No JSON array found in response")
+        return None
 
 def main():
     """CLI interface for experimental reasoning citation checker"""
@@ -389,9 +836,14 @@ def main():
     parser.add_argument("--effort", choices=["low", "medium", "high"], default="high",
                        help="Reasoning effort level (default: high)")
     parser.add_argument("--debug", action="store_true", help="Enable debug output")
-    parser.add_argument("--batch-size", type=int, default=10, help="Batch size for processing")
+    parser.add_argument("--batch-size", type=int,
+                       help="Maximum paragraphs per batch (default: pack batches by token budget)")
+    parser.add_argument("--batch-api", action="store_true",
+                       help="Submit oversized documents through the OpenAI Batch API (half price, may take hours)")
+    parser.add_argument("--batch-id", help="Resume a Batch API job submitted by an earlier run")
     
     args = parser.parse_args()
+    logging.basicConfig(level=logging.DEBUG if args.debug else logging.INFO, format="%(message)s", stream=sys.stdout)
     
     # Read input file
     try:
@@ -410,7 +862,9 @@ def main():
         output_file=args.output,
         effort=ReasoningEffort(args.effort) if args.effort else ReasoningEffort.HIGH,
         debug=args.debug,
-        batch_size=args.batch_size
+        batch_size=args.batch_size,
+        use_batch_api=args.batch_api,
+        batch_id=args.batch_id
     )
     
     if results:
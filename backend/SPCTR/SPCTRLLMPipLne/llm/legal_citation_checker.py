@@ -2,8 +2,11 @@
 Legal Citation Checker - Analyzes legal documents for Bluebook citation violations
 """
 import json
+import logging
 import sys
 import re
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Optional, Any, Union
 
@@ -13,8 +16,7 @@ sys.path.append(str(Path(__file__).parent.parent))
 from config.config import config, LLMProvider
 from llm.llm_client import LLMClient, LLMClientFactory
 from llm.token_estimator import TokenEstimator
-from core.xml_to_anchored_txt import xml_to_anchored_txt
-from core.extract_docx_xml import extract_docx_xml
+from core.anchored_text_cache import load_anchored_docx
 
 # Import reasoning validator
 try:
@@ -88,7 +90,8 @@ class LegalCitationChecker:
         print(f"✅ API key configured for {provider.value} citation checker")
     
     def check_citations_from_docx(self, docx_path: str, output_file: Optional[str] = None, 
-                                 debug: bool = False, enable_reasoning: Optional[bool] = None) -> Optional[Dict[str, Any]]:
+                                 debug: bool = False, enable_reasoning: Optional[bool] = None,
+                                 max_workers: Optional[int] = None) -> Optional[Dict[str, Any]]:
         """
         Check citations in a DOCX file
         
@@ -97,6 +100,7 @@ class LegalCitationChecker:
             output_file: Optional output file for results
             debug: Enable debug output
             enable_reasoning: Override reasoning setting for this check
+            max_workers: Maximum concurrent LLM requests when batching (defaults to provider limit)
             
         Returns:
             Citation analysis results
@@ -115,25 +119,21 @@ class LegalCitationChecker:
             
             # Step 1: Extract XML from DOCX
             print("🔧 Step 1: Extracting XML...")
-            xml_file = extract_docx_xml(str(docx_path_obj))
-            if not xml_file:
+            xml_content, anchored_text = load_anchored_docx(docx_path_obj)
+            if not xml_content:
                 print("❌ Failed to extract XML")
                 return None
             
-            # Step 2: Convert to anchored TXT
+            # Step 2: Convert to anchored text in memory (reused for unchanged files)
             print("🔗 Step 2: Converting to anchored TXT...")
-            anchored_txt_file = xml_to_anchored_txt(xml_file)
-            if not anchored_txt_file:
+            if not anchored_text:
                 print("❌ Failed to convert to anchored TXT")
                 return None
             
-            # Step 3: Read anchored text
-            with open(anchored_txt_file, 'r', encoding='utf-8') as f:
-                anchored_text = f.read()
-            
             # Step 4: Check citations
             print("🔍 Step 3: Checking citations...")
-            results = self.check_citations_in_text(anchored_text, debug=debug, output_file=output_file, enable_reasoning=enable_reasoning)
+            results = self.check_citations_in_text(anchored_text, debug=debug, output_file=output_file, 
+                                                   enable_reasoning=enable_reasoning, max_workers=max_workers)
             
             # Step 5: Save results
             if results and output_file:
@@ -149,7 +149,8 @@ class LegalCitationChecker:
             return None
     
     def check_citations_in_text(self, text: str, debug: bool = False, output_file: Optional[str] = None, 
-                               enable_reasoning: Optional[bool] = None) -> Optional[Dict[str, Any]]:
+                               enable_reasoning: Optional[bool] = None,
+                               max_workers: Optional[int] = None) -> Optional[Dict[str, Any]]:
         """
         Check citations in text with batching support and optional reasoning validation
         
@@ -158,6 +159,7 @@ class LegalCitationChecker:
             debug: Enable debug output
             output_file: Optional output file for results
             enable_reasoning: Override reasoning setting for this check
+            max_workers: Maximum concurrent LLM requests when batching (defaults to provider limit)
             
         Returns:
             Citation analysis results
@@ -177,7 +179,7 @@ class LegalCitationChecker:
         
         if analysis['needs_batching']:
             print(f"📦 Text requires batching into {analysis['recommended_batches']} batches")
-            first_pass_results = self._check_citations_batched(text, analysis, debug, output_file)
+            first_pass_results = self._check_citations_batched(text, analysis, debug, output_file, max_workers)
         else:
             print("✅ Text fits in single context window")
             first_pass_results = self._check_citations_single(text, debug, output_file)
@@ -214,6 +216,50 @@ class LegalCitationChecker:
         
         return first_pass_results
     
+    async def acheck_citations_in_files(self, text_files: List[str], output_dir: str, debug: bool = False,
+                                        max_concurrency: int = 4) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Check citations in many text files concurrently
+        
+        File reads and citation checks run in worker threads, so disk reads for
+        later files overlap with LLM requests for earlier ones.
+        
+        Args:
+            text_files: Paths to anchored text files
+            output_dir: Directory for per-file JSON results
+            debug: Enable debug output
+            max_concurrency: Maximum number of files checked at once
+            
+        Returns:
+            Mapping of input path to citation analysis results (None on failure)
+        """
+        output_path = Path(output_dir)
+        output_path.mkdir(parents=True, exist_ok=True)
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def check_file(text_file: str) -> Optional[Dict[str, Any]]:
+            text_path = Path(text_file)
+            try:
+                text = await asyncio.to_thread(text_path.read_text, encoding='utf-8')
+            except Exception as e:
+                print(f"❌ Failed to read text file {text_path}: {e}")
+                return None
+            
+            async with semaphore:
+                output_file = output_path / f"{text_path.stem}.json"
+                results = await asyncio.to_thread(
+                    self.check_citations_in_text, text, debug, str(output_file)
+                )
+            
+            if results:
+                with open(output_file, 'w', encoding='utf-8') as f:
+                    json.dump(results, f, indent=2)
+                print(f"✅ Results saved to: {output_file}")
+            return results
+        
+        results = await asyncio.gather(*[check_file(text_file) for text_file in text_files])
+        return dict(zip(text_files, results))
+    
     def _structure_citation_results(self, citations: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Structure raw citation array into proper results format"""
         total_citations = len(citations)
@@ -230,8 +276,13 @@ class LegalCitationChecker:
             "recommendations": []
         }
     
-    def _check_citations_single(self, text: str, debug: bool = False, output_file: Optional[str] = None) -> Optional[Dict[str, Any]]:
-        """Check citations in a single API call"""
+    def _check_citations_single(self, text: str, debug: bool = False, output_file: Optional[str] = None,
+                                batch_num: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Check citations in a single API call
+        
+        batch_num (1-based) gives concurrent batches their own raw output file.
+        """
         import json
         import re
         
@@ -262,7 +313,8 @@ class LegalCitationChecker:
                 # Always save the raw LLM output
                 raw_output_path = None
                 if output_file:
-                    raw_output_path = Path(output_file).with_suffix('.raw.txt')
+                    raw_suffix = f'.batch{batch_num}.raw.txt' if batch_num is not None else '.raw.txt'
+                    raw_output_path = Path(output_file).with_suffix(raw_suffix)
                     with open(raw_output_path, 'w', encoding='utf-8') as f:
                         f.write(content)
                     if debug:
@@ -322,8 +374,9 @@ class LegalCitationChecker:
             return None
     
     def _check_citations_batched(self, text: str, analysis: Dict[str, Any], 
-                                debug: bool = False, output_file: Optional[str] = None) -> Optional[Dict[str, Any]]:
-        """Check citations using batching"""
+                                debug: bool = False, output_file: Optional[str] = None,
+                                max_workers: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Check citations using batching, sending independent batches concurrently"""
         try:
             # Split text into batches
             available_tokens = analysis['available_tokens']
@@ -335,16 +388,23 @@ class LegalCitationChecker:
             citations_with_errors = 0
             citations_correct = 0
             
-            print(f"🔄 Processing {len(batches)} batches...")
+            if max_workers is None:
+                max_workers = config.max_concurrent_requests.get(self.provider, 4)
+            
+            print(f"🔄 Processing {len(batches)} batches ({max_workers} concurrent)...")
             
-            for i, batch in enumerate(batches):
+            def check_batch(indexed_batch):
+                i, batch = indexed_batch
                 batch_info = batch.get('batch_info', {})
                 anchor_count = batch_info.get('anchor_count', 0)
                 print(f"📦 Processing batch {i+1}/{len(batches)} ({anchor_count} anchors)")
-                
-                batch_text = batch['text']
-                batch_results = self._check_citations_single(batch_text, debug, output_file)
-                
+                return self._check_citations_single(batch['text'], debug, output_file, i + 1)
+            
+            # The LLM calls are network-bound, so threads overlap them; map() keeps batch order
+            with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+                batch_results_list = list(executor.map(check_batch, enumerate(batches)))
+            
+            for batch_results in batch_results_list:
                 if batch_results:
                     all_results.append(batch_results)
                     
@@ -448,19 +508,11 @@ class LegalCitationChecker:
             Citation analysis results
         """
         try:
-            # Extract XML and convert to anchored TXT
-            xml_file = extract_docx_xml(docx_path)
-            if not xml_file:
-                return None
-            
-            anchored_txt_file = xml_to_anchored_txt(xml_file)
-            if not anchored_txt_file:
+            # Extract XML and convert to anchored text in memory
+            _, anchored_text = load_anchored_docx(docx_path)
+            if not anchored_text:
                 return None
             
-            # Read anchored text
-            with open(anchored_txt_file, 'r', encoding='utf-8') as f:
-                anchored_text = f.read()
-            
             # Split into paragraphs
             paragraphs = self._split_into_paragraphs(anchored_text)
             
@@ -740,12 +792,15 @@ def main():
         print("Usage:")
         print("  python legal_citation_checker.py check <docx_file> [output.json]")
         print("  python legal_citation_checker.py check-text <text_file> [output.json]")
+        print("  python legal_citation_checker.py batch <text_dir> <output_dir>")
         print("\nOptions:")
         print("  --debug: Enable debug output")
+        print("  --concurrency N: Files checked at once in batch mode (default: 4)")
         sys.exit(1)
     
     command = sys.argv[1].lower()
     debug = "--debug" in sys.argv
+    logging.basicConfig(level=logging.DEBUG if debug else logging.INFO, format="%(message)s", stream=sys.stdout)
     
     checker = LegalCitationChecker()
     
@@ -786,6 +841,31 @@ def main():
                     json.dump(results, f, indent=2)
                 print(f"✅ Results saved to: {output_file}")
     
+    elif command == "batch":
+        if len(sys.argv) < 4:
+            print("❌ Text directory and output directory required")
+            sys.exit(1)
+        
+        text_dir = Path(sys.argv[2])
+        output_dir = sys.argv[3]
+        
+        max_concurrency = 4
+        if "--concurrency" in sys.argv:
+            i = sys.argv.index("--concurrency")
+            if i + 1 < len(sys.argv):
+                max_concurrency = int(sys.argv[i + 1])
+        
+        text_files = sorted(str(p) for p in text_dir.glob("*.txt"))
+        if not text_files:
+            print(f"❌ No text files found in: {text_dir}")
+            sys.exit(1)
+        
+        print(f"📂 Checking {len(text_files)} files (concurrency: {max_concurrency})")
+        all_results = asyncio.run(checker.acheck_citations_in_files(text_files, output_dir, debug, max_concurrency))
+        
+        succeeded = sum(1 for r in all_results.values() if r)
+        print(f"\n📊 Batch complete: {succeeded}/{len(text_files)} files checked successfully")
+    
     else:
         print(f"❌ Unknown command: {command}")
         sys.exit(1)
@@ -2,9 +2,12 @@
 Multi-provider LLM API client supporting Llama and OpenAI
 """
 import json
+import asyncio
+import re
 import requests
 import time
-from typing import List, Dict, Any, Optional, Union, TYPE_CHECKING
+from requests.adapters import HTTPAdapter
+from typing import List, Dict, Any, Optional, Union, Iterator, Tuple, TYPE_CHECKING
 from config.config import config, LLMProvider
 
 # Import OpenAI SDK if available
@@ -15,11 +18,42 @@ try:
 except ImportError:
     OPENAI_SDK_AVAILABLE = False
 
+# Import tiktoken if available (used for preflight token counting)
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
 if TYPE_CHECKING:
     from openai.types.chat import ChatCompletionMessageParam
 else:
     ChatCompletionMessageParam = Any
 
+# Keep-alive connections kept per host, sized for concurrent batch requests
+HTTP_POOL_MAXSIZE = 16
+
+# Number of tokens shared between neighbouring chunks of an oversized document
+CHUNK_OVERLAP_TOKENS = 128
+
+# Edited text can run longer than its input, so an edit chunk uses only this
+# share of the response budget
+EDIT_OUTPUT_HEADROOM = 0.8
+
+# Blank line between paragraphs (anchored text joins paragraphs with "\n\n")
+PARAGRAPH_BREAK_RE = re.compile(r'\n[ \t]*\n\s*')
+
+# System prompts for document edits and analyses (also part of their response cache keys)
+EDIT_SYSTEM_PROMPT = "You are a document editor. Edit the text according to the instruction while preserving the original structure and formatting."
+ANALYSIS_SYSTEM_PROMPT = "You are a document analyst."
+
+class StreamingUnavailableError(Exception):
+    """The streaming request could not be made, so nothing was generated"""
+
+def _maybe_strip(s: str) -> str:
+    """Strip edge whitespace only when present, skipping the full-string scan otherwise"""
+    return s.strip() if (s and (s[0].isspace() or s[-1].isspace())) else s
+
 class LLMClient:
     """Unified client for multiple LLM providers"""
     
@@ -46,6 +80,129 @@ class LLMClient:
                 "Authorization": f"Bearer {self.api_key}",
                 "Content-Type": "application/json"
             }
+        
+        self.context_window = config.get_context_window(self.model)
+        self.encoding = self._get_encoding()
+        
+        # Persistent session so repeated requests reuse TCP/TLS connections
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_MAXSIZE)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+    
+    def _get_encoding(self):
+        """Get a tiktoken encoding for the model, or None to fall back to estimation"""
+        if not TIKTOKEN_AVAILABLE or self.provider != LLMProvider.OPENAI:
+            return None
+        try:
+            return tiktoken.encoding_for_model(self.model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    
+    def count_tokens(self, text: str) -> int:
+        """Count tokens in text (~4 characters per token when no tokenizer is available)"""
+        if not text:
+            return 0
+        if self.encoding is not None:
+            return len(self.encoding.encode(text))
+        return len(text) // 4 + 1
+    
+    def _split_into_chunks(self, text: str, chunk_tokens: int, overlap_tokens: int = 0) -> List[Tuple[str, str]]:
+        """
+        Split text into chunks of at most chunk_tokens at paragraph boundaries
+        
+        A paragraph longer than chunk_tokens is split between words, so neither
+        words nor ⟦P-#####⟧ anchors are ever cut. With overlap_tokens, each chunk
+        also repeats the last paragraphs of the previous one (for analysis only;
+        overlapping chunks cannot be rejoined).
+        
+        Returns:
+            (chunk, separator) pairs, separator being the original text between a
+            chunk and the next one ("" after the last), so edited chunks can be rejoined
+        """
+        # (paragraph, separator after it, tokens) units in document order
+        units = []
+        position = 0
+        for match in [*PARAGRAPH_BREAK_RE.finditer(text), None]:
+            end = match.start() if match else len(text)
+            separator = match.group() if match else ""
+            paragraph = text[position:end]
+            if paragraph:
+                units.extend(self._split_paragraph(paragraph, separator, chunk_tokens))
+            elif units:
+                units[-1] = (units[-1][0], units[-1][1] + separator, units[-1][2])
+            position = match.end() if match else len(text)
+        
+        chunks = []
+        start = 0
+        while start < len(units):
+            end, used = start, 0
+            while end < len(units) and (end == start or used + units[end][2] <= chunk_tokens):
+                used += units[end][2]
+                end += 1
+            # Repeat trailing paragraphs of the previous chunk while they fit in the overlap
+            overlap_start = start
+            overlap_used = 0
+            while (overlap_start > 0 and chunks
+                   and overlap_used + units[overlap_start - 1][2] <= min(overlap_tokens, chunk_tokens - used)):
+                overlap_used += units[overlap_start - 1][2]
+                overlap_start -= 1
+            chunk = "".join(paragraph + separator for paragraph, separator, _ in units[overlap_start:end - 1])
+            chunks.append((chunk + units[end - 1][0], units[end - 1][1]))
+            start = end
+        return chunks or [(text, "")]
+    
+    def _split_paragraph(self, paragraph: str, separator: str, chunk_tokens: int) -> List[Tuple[str, str, int]]:
+        """Split one paragraph into (piece, separator, tokens) units of at most chunk_tokens, between words"""
+        tokens = self.count_tokens(paragraph)
+        if tokens <= chunk_tokens:
+            return [(paragraph, separator, tokens)]
+        
+        # Cut at the last space before the estimated character limit
+        max_chars = max(1, int(len(paragraph) * chunk_tokens / tokens * 0.9))
+        pieces = []
+        rest = paragraph
+        while self.count_tokens(rest) > chunk_tokens:
+            cut = rest.rfind(" ", 1, max_chars)
+            if cut == -1:
+                # No space within the limit: an overlong "word" has to be cut
+                pieces.append((rest[:max_chars], ""))
+                rest = rest[max_chars:]
+            else:
+                pieces.append((rest[:cut], " "))
+                rest = rest[cut + 1:]
+        pieces.append((rest, separator))
+        return [(piece, piece_separator, self.count_tokens(piece)) for piece, piece_separator in pieces]
+    
+    def _preflight_chunks(self, text: str, messages_overhead: List[Dict[str, str]],
+                          max_tokens: int, overlap_tokens: int = 0,
+                          output_echoes_input: bool = False) -> List[Tuple[str, str]]:
+        """
+        Check whether text fits in the model context alongside the prompt and response budget
+        
+        With output_echoes_input (edits, whose reply is the rewritten text), the
+        text must also fit in the max_tokens response budget.
+        
+        Returns:
+            [(text, "")] if it fits, otherwise the (chunk, separator) pairs from _split_into_chunks
+        """
+        prompt_overhead = sum(self.count_tokens(m["content"]) for m in messages_overhead)
+        available = self.context_window - max_tokens - prompt_overhead
+        if output_echoes_input:
+            available = min(available, int(max_tokens * EDIT_OUTPUT_HEADROOM))
+        if available <= overlap_tokens:
+            raise ValueError(f"Prompt and response budget exceed the {self.model} context window")
+        if self.count_tokens(text) <= available:
+            return [(text, "")]
+        chunks = self._split_into_chunks(text, available, overlap_tokens)
+        print(f"📦 Text exceeds the {self.model} request budget, splitting into {len(chunks)} chunks")
+        return chunks
+    
+    def _extract_content(self, response: Optional[Dict]) -> str:
+        """Extract message content from a chat completion response"""
+        if response and 'choices' in response and len(response['choices']) > 0:
+            return _maybe_strip(response['choices'][0]['message']['content'])
+        raise Exception("No content in API response")
     
     def _make_request(self, endpoint: str, data: Dict, max_retries: int = 3) -> Optional[Dict]:
         """Make API request with retry logic"""
@@ -54,7 +211,7 @@ class LLMClient:
         for attempt in range(max_retries):
             try:
                 print(f"🔄 {self.provider.value.title()} API request attempt {attempt + 1}/{max_retries}")
-                response = requests.post(url, headers=self.headers, json=data, timeout=self.timeout)
+                response = self.session.post(url, headers=self.headers, json=data, timeout=self.timeout)
                 
                 if response.status_code == 200:
                     return response.json()
@@ -87,6 +244,43 @@ class LLMClient:
         
         return None
     
+    def _stream_request(self, endpoint: str, data: Dict, max_retries: int = 3) -> Iterator[str]:
+        """Make a streaming API request and yield content deltas as they arrive"""
+        url = f"{self.base_url}/{endpoint}"
+        data = {**data, "stream": True}
+        
+        for attempt in range(max_retries):
+            print(f"🔄 {self.provider.value.title()} streaming request attempt {attempt + 1}/{max_retries}")
+            try:
+                response = self.session.post(url, headers=self.headers, json=data, timeout=self.timeout, stream=True)
+                if response.status_code == 200:
+                    break
+                print(f"❌ {self.provider.value.title()} API request failed with status {response.status_code}: {response.text}")
+                response.close()
+            except requests.exceptions.Timeout:
+                print(f"⏰ {self.provider.value.title()} request timed out (attempt {attempt + 1})")
+            except requests.exceptions.RequestException as e:
+                print(f"❌ {self.provider.value.title()} API request error: {e}")
+            if attempt == max_retries - 1:
+                raise StreamingUnavailableError(f"{self.provider.value.title()} streaming request failed")
+            wait_time = 2 ** attempt  # Exponential backoff
+            print(f"⏳ Retrying in {wait_time} seconds...")
+            time.sleep(wait_time)
+        
+        # Server-sent events: one "data: {...}" line per delta, terminated by "data: [DONE]"
+        with response:
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                payload = line[5:].strip()
+                if payload == "[DONE]":
+                    break
+                choices = json.loads(payload).get("choices") or []
+                if choices:
+                    content = choices[0].get("delta", {}).get("content")
+                    if content:
+                        yield content
+    
     def chat_completion(
         self, 
         messages: List[Dict[str, str]], 
@@ -116,6 +310,31 @@ class LLMClient:
             raise Exception(f"{self.provider.value.title()} API request failed")
         return response
     
+    async def achat_completion(
+        self, 
+        messages: List[Dict[str, str]], 
+        temperature: float = 0.7,
+        max_tokens: int = 1000,
+    ) -> Dict[str, Any]:
+        """Async wrapper around chat_completion that runs the blocking request in a worker thread"""
+        return await asyncio.to_thread(self.chat_completion, messages, temperature, max_tokens)
+    
+    async def achat_completion_many(
+        self, 
+        messages_list: List[List[Dict[str, str]]], 
+        temperature: float = 0.7,
+        max_tokens: int = 1000,
+    ) -> List[Dict[str, Any]]:
+        """
+        Send several chat completion requests concurrently
+        
+        Returns:
+            API responses in the same order as messages_list
+        """
+        return await asyncio.gather(*[
+            self.achat_completion(messages, temperature, max_tokens) for messages in messages_list
+        ])
+    
     def edit_document(
         self, 
         text: str, 
@@ -135,26 +354,67 @@ class LLMClient:
         Returns:
             Edited text
         """
-        messages = [
-            {"role": "system", "content": "You are a document editor. Edit the text according to the instruction while preserving the original structure and formatting."},
-            {"role": "user", "content": f"Instruction: {instruction}\n\nText to edit:\n{text}"}
-        ]
+        def build_messages(chunk: str) -> List[Dict[str, str]]:
+            return [
+                {"role": "system", "content": EDIT_SYSTEM_PROMPT},
+                {"role": "user", "content": f"Instruction: {instruction}\n\nText to edit:\n{chunk}"}
+            ]
+        
+        # Edited chunks are rejoined with their original separators, so they must not overlap
+        chunks = self._preflight_chunks(text, build_messages(""), max_tokens, output_echoes_input=True)
         
-        response = self._make_request("chat/completions", {
+        if len(chunks) == 1:
+            response = self._make_request("chat/completions", {
+                "model": self.model, 
+                "messages": build_messages(text), 
+                "temperature": temperature, 
+                "max_tokens": max_tokens
+            })
+            
+            if response is None:
+                raise Exception(f"Document editing failed with {self.provider.value}")
+            
+            return self._extract_content(response)
+        
+        responses = asyncio.run(self.achat_completion_many(
+            [build_messages(chunk) for chunk, _ in chunks], temperature, max_tokens
+        ))
+        return "".join(
+            self._extract_content(response) + separator
+            for response, (_, separator) in zip(responses, chunks)
+        )
+    
+    def edit_document_stream(
+        self, 
+        text: str, 
+        instruction: str,
+        temperature: float = 0.3,
+        max_tokens: int = 2000
+    ) -> Iterator[str]:
+        """
+        Edit a document based on an instruction, yielding the edited text as it is generated
+        
+        Documents that need splitting are edited chunk-by-chunk concurrently and
+        yielded once complete, as in edit_document.
+        """
+        def build_messages(chunk: str) -> List[Dict[str, str]]:
+            return [
+                {"role": "system", "content": EDIT_SYSTEM_PROMPT},
+                {"role": "user", "content": f"Instruction: {instruction}\n\nText to edit:\n{chunk}"}
+            ]
+        
+        chunks = self._preflight_chunks(text, build_messages(""), max_tokens, output_echoes_input=True)
+        
+        if len(chunks) > 1:
+            yield self.edit_document(text, instruction, temperature, max_tokens)
+            return
+        
+        yield from self._stream_request("chat/completions", {
             "model": self.model, 
-            "messages": messages, 
+            "messages": build_messages(text), 
             "temperature": temperature, 
             "max_tokens": max_tokens
         })
-        
-        if response is None:
-            raise Exception(f"Document editing failed with {self.provider.value}")
-        
-        if 'choices' in response and len(response['choices']) > 0:
-            content = response['choices'][0]['message']['content']
-            return content.strip()
-        else:
-            raise Exception("No content in API response")
     
     def analyze_document(
         self, 
@@ -184,26 +444,56 @@ class LLMClient:
         
         prompt = analysis_prompts.get(analysis_type, analysis_prompts["general"])
         
-        messages = [
-            {"role": "system", "content": "You are a document analyst."},
-            {"role": "user", "content": f"{prompt}\n\nDocument:\n{text}"}
-        ]
+        def build_messages(chunk: str) -> List[Dict[str, str]]:
+            return [
+                {"role": "system", "content": ANALYSIS_SYSTEM_PROMPT},
+                {"role": "user", "content": f"{prompt}\n\nDocument:\n{chunk}"}
+            ]
         
-        response = self._make_request("chat/completions", {
-            "model": self.model, 
-            "messages": messages, 
-            "temperature": temperature, 
-            "max_tokens": max_tokens
-        })
+        chunks = self._preflight_chunks(text, build_messages(""), max_tokens, CHUNK_OVERLAP_TOKENS)
         
-        if response is None:
-            raise Exception(f"Document analysis failed with {self.provider.value}")
+        if len(chunks) == 1:
+            response = self._make_request("chat/completions", {
+                "model": self.model, 
+                "messages": build_messages(text), 
+                "temperature": temperature, 
+                "max_tokens": max_tokens
+            })
+            
+            if response is None:
+                raise Exception(f"Document analysis failed with {self.provider.value}")
+            
+            return self._extract_content(response)
         
-        if 'choices' in response and len(response['choices']) > 0:
-            content = response['choices'][0]['message']['content']
-            return content.strip()
-        else:
-            raise Exception("No content in API response")
+        # Analyze chunks concurrently, then summarize the partial analyses into one
+        def build_combine_messages(partial_analyses: str) -> List[Dict[str, str]]:
+            return [
+                {"role": "system", "content": ANALYSIS_SYSTEM_PROMPT},
+                {"role": "user", "content": f"The following are analyses of consecutive parts of one document. "
+                                            f"Combine them into a single response to: {prompt}\n\n{partial_analyses}"}
+            ]
+        
+        responses = asyncio.run(self.achat_completion_many(
+            [build_messages(chunk) for chunk, _ in chunks], temperature, max_tokens
+        ))
+        
+        # The combining request is preflighted too: if the partial analyses do not
+        # fit, they are combined in groups first, until a single request suffices
+        while True:
+            partial_analyses = "\n\n".join(
+                f"Part {i}:\n{self._extract_content(response)}" for i, response in enumerate(responses, 1)
+            )
+            groups = self._preflight_chunks(partial_analyses, build_combine_messages(""), max_tokens)
+            if len(groups) == 1:
+                break
+            if len(groups) >= len(responses):
+                raise ValueError(f"Partial analyses cannot be combined within the {self.model} context window")
+            responses = asyncio.run(self.achat_completion_many(
+                [build_combine_messages(group) for group, _ in groups], temperature, max_tokens
+            ))
+        
+        response = self.chat_completion(build_combine_messages(partial_analyses), temperature, max_tokens)
+        return self._extract_content(response)
     
     def test_connection(self) -> bool:
         """Test API connection with a simple request"""
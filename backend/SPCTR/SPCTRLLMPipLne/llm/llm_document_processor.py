@@ -1,44 +1,63 @@
 """
 Main LLM Document Processor - Integrates anchor token pipeline with LLM API
 """
+import os
 import sys
+import asyncio
 from pathlib import Path
-from typing import Optional, Dict, Any
-import json
+from typing import Optional, Dict, Any, List, Tuple, Callable
+
+# Use orjson for status I/O if available
+try:
+    import orjson
+    _dumps = orjson.dumps
+    _loads = orjson.loads
+except ImportError:
+    import json
+    _dumps = lambda obj: json.dumps(obj).encode('utf-8')
+    _loads = json.loads
 
 # Add parent directory to path to import from core and config folders
 sys.path.append(str(Path(__file__).parent.parent))
 
 from config.config import config, LLMProvider
-from llm.llm_client import LLMClient, LLMClientFactory
-from core.xml_to_anchored_txt import xml_to_anchored_txt
-from core.anchored_txt_to_xml import anchored_txt_to_xml
-from core.extract_docx_xml import extract_docx_xml
-from core.repackage_docx_xml import repackage_docx_xml
-from llm.legal_citation_checker import LegalCitationChecker
+from llm.llm_client import (LLMClient, LLMClientFactory, StreamingUnavailableError,
+                            EDIT_SYSTEM_PROMPT, ANALYSIS_SYSTEM_PROMPT)
+from llm.response_cache import ResponseCache
 from utils.metadata_manager import MetadataManager
 
 HANDSHAKE_STATUS_FILE = Path(__file__).parent.parent / '.llm_handshake_status.json'
 
+# Parsed handshake status, reused until the status file's mtime changes
+_handshake_cache = {'mtime': None, 'status': None}
+
 def get_handshake_status():
-    if HANDSHAKE_STATUS_FILE.exists():
-        try:
-            with open(HANDSHAKE_STATUS_FILE, 'r') as f:
-                data = json.load(f)
-                return data.get('status', 'unknown')
-        except Exception:
-            return 'unknown'
-    return 'unknown'
+    try:
+        mtime = HANDSHAKE_STATUS_FILE.stat().st_mtime_ns
+    except OSError:
+        return 'unknown'
+    if mtime == _handshake_cache['mtime']:
+        return _handshake_cache['status']
+    try:
+        status = _loads(HANDSHAKE_STATUS_FILE.read_bytes()).get('status', 'unknown')
+    except Exception:
+        return 'unknown'
+    _handshake_cache['mtime'] = mtime
+    _handshake_cache['status'] = status
+    return status
 
 def set_handshake_status(status):
+    # Write to a per-process temp file and rename it into place so concurrent
+    # readers never see a partially written status file
+    tmp_file = HANDSHAKE_STATUS_FILE.with_name(f"{HANDSHAKE_STATUS_FILE.name}.{os.getpid()}.tmp")
     try:
-        with open(HANDSHAKE_STATUS_FILE, 'w') as f:
-            json.dump({'status': status}, f)
+        tmp_file.write_bytes(_dumps({'status': status}))
+        os.replace(tmp_file, HANDSHAKE_STATUS_FILE)
     except Exception as e:
         print(f"Warning: Could not save handshake status: {e}")
 
 def perform_handshake():
-    processor = LLMDocumentProcessor()
+    processor = _get_processor()
     # Check if any provider is configured
     available_providers = config.list_available_providers()
     if not any(available_providers.values()):
@@ -72,14 +91,14 @@ class LLMDocumentProcessor:
         self.api_key = api_key
         self.model = model
         self.client = None
-        self.citation_checker = None
+        self._citation_checker = None
         self.working_dir = Path.cwd()
         self.metadata_manager = MetadataManager(self.working_dir)
+        self.response_cache = ResponseCache()
         
         # Initialize client if provider and API key are provided
         if provider and api_key:
             self.client = LLMClient(provider, api_key, model)
-            self.citation_checker = LegalCitationChecker(api_key=api_key, model=model, provider=provider)
         else:
             # Try to initialize from config - prioritize OpenAI over Llama
             available_providers = config.list_available_providers()
@@ -93,7 +112,6 @@ class LLMDocumentProcessor:
                     self.api_key = api_key
                     self.model = model or config.default_models[provider]
                     self.client = LLMClient(provider, api_key, self.model)
-                    self.citation_checker = LegalCitationChecker(api_key=api_key, model=self.model, provider=provider)
                     print(f"✅ Auto-configured {provider.value} client")
                     return
             
@@ -107,10 +125,21 @@ class LLMDocumentProcessor:
                         self.api_key = api_key
                         self.model = model or config.default_models[provider]
                         self.client = LLMClient(provider, api_key, self.model)
-                        self.citation_checker = LegalCitationChecker(api_key=api_key, model=self.model, provider=provider)
                         print(f"✅ Auto-configured {provider.value} client")
                         break
     
+    @property
+    def citation_checker(self):
+        """Legal citation checker for the configured provider, created on first use"""
+        if self._citation_checker is None and self.provider and self.api_key:
+            from llm.legal_citation_checker import LegalCitationChecker
+            self._citation_checker = LegalCitationChecker(api_key=self.api_key, model=self.model, provider=self.provider)
+        return self._citation_checker
+    
+    @citation_checker.setter
+    def citation_checker(self, checker):
+        self._citation_checker = checker
+    
     def setup_api_key(self, provider: LLMProvider, api_key: str, model: Optional[str] = None):
         """Setup API key for the processor"""
         self.provider = provider
@@ -123,7 +152,7 @@ class LLMDocumentProcessor:
         
         # Initialize clients
         self.client = LLMClient(provider, api_key, model)
-        self.citation_checker = LegalCitationChecker(api_key=api_key, model=model, provider=provider)
+        self._citation_checker = None
         print(f"✅ API key configured successfully for {provider.value}")
     
     def test_api_connection(self) -> bool:
@@ -165,6 +194,10 @@ class LLMDocumentProcessor:
         Returns:
             Path to the edited DOCX file, or None if failed
         """
+        from core.anchored_text_cache import load_anchored_docx
+        from core.anchored_txt_to_xml import anchored_txt_to_xml
+        from core.repackage_docx_xml import repackage_docx_xml
+        
         # Create metadata for this processing operation
         metadata = self.metadata_manager.create_document_metadata(docx_path)
         processing_id = metadata["processing_id"]
@@ -192,10 +225,10 @@ class LLMDocumentProcessor:
             return None
         
         try:
-            # Step 1: Extract XML from DOCX
+            # Step 1: Extract XML from DOCX (kept in memory, reused for unchanged files)
             print("🔧 Step 1: Extracting XML...")
-            xml_file = extract_docx_xml(str(docx_path_obj))
-            if not xml_file:
+            xml_content, anchored_text = load_anchored_docx(docx_path_obj)
+            if not xml_content:
                 error_msg = "Failed to extract XML"
                 print(f"❌ {error_msg}")
                 metadata = self.metadata_manager.add_pipeline_step(metadata, "extract_xml", 
@@ -204,52 +237,52 @@ class LLMDocumentProcessor:
                 return None
             
             metadata = self.metadata_manager.add_pipeline_step(metadata, "extract_xml", 
-                                                              docx_path, xml_file, "completed")
+                                                              docx_path, None, "completed")
             
-            # Step 2: Convert XML to anchored TXT
+            # Step 2: Convert XML to anchored text
             print("🔗 Step 2: Converting to anchored TXT...")
-            anchored_txt_file = xml_to_anchored_txt(xml_file)
-            if not anchored_txt_file:
+            if not anchored_text:
                 error_msg = "Failed to convert to anchored TXT"
                 print(f"❌ {error_msg}")
                 metadata = self.metadata_manager.add_pipeline_step(metadata, "convert_to_anchored_txt", 
-                                                                  xml_file, None, "failed", error_msg)
+                                                                  docx_path, None, "failed", error_msg)
                 self.metadata_manager.save_metadata(metadata)
                 return None
             
             metadata = self.metadata_manager.add_pipeline_step(metadata, "convert_to_anchored_txt", 
-                                                              xml_file, anchored_txt_file, "completed")
-            
-            # Step 3: Read anchored text
-            with open(anchored_txt_file, 'r', encoding='utf-8') as f:
-                anchored_text = f.read()
-            
-            # Step 4: Send to LLM for editing
-            print("🤖 Step 3: Sending to LLM for editing...")
-            edited_text = self.client.edit_document(
-                anchored_text, 
-                instruction, 
-                temperature, 
-                max_tokens
-            )
+                                                              docx_path, None, "completed")
             
-            # Step 5: Save edited text
+            # Step 4: Send to LLM for editing (deterministic runs are served from cache)
             edited_txt_file = self.metadata_manager.create_output_filename(
                 docx_path, processing_id, "edited_anchored", ".txt"
             )
-            with open(edited_txt_file, 'w', encoding='utf-8') as f:
-                f.write(edited_text)
+            cache_key = ResponseCache.make_key("edit", self.client.provider.value, self.client.model, EDIT_SYSTEM_PROMPT,
+                                               anchored_text, instruction, temperature, max_tokens)
+            use_cache = ResponseCache.is_cacheable(temperature)
+            edited_text = self.response_cache.get(cache_key) if use_cache else None
+            if edited_text is not None:
+                print("💾 Step 3: Using cached LLM edit")
+                Path(edited_txt_file).write_text(edited_text, encoding='utf-8')
+            else:
+                print("🤖 Step 3: Sending to LLM for editing...")
+                # Step 5: The edited text is saved as it streams in
+                edited_text = self._stream_edit_to_file(
+                    edited_txt_file,
+                    anchored_text, 
+                    instruction, 
+                    temperature, 
+                    max_tokens
+                )
+                if use_cache:
+                    self.response_cache.set(cache_key, edited_text)
             
             metadata = self.metadata_manager.add_pipeline_step(metadata, "llm_editing", 
-                                                              anchored_txt_file, edited_txt_file, "completed")
+                                                              docx_path, edited_txt_file, "completed")
             
             # Step 6: Convert back to XML
             print("🔄 Step 4: Converting back to XML...")
-            reconstructed_xml = anchored_txt_to_xml(
-                str(edited_txt_file), 
-                xml_file
-            )
-            if not reconstructed_xml:
+            reconstructed_xml_content = anchored_txt_to_xml(edited_text, xml_content, in_memory=True)
+            if not reconstructed_xml_content:
                 error_msg = "Failed to reconstruct XML"
                 print(f"❌ {error_msg}")
                 metadata = self.metadata_manager.add_pipeline_step(metadata, "convert_to_xml", 
@@ -257,6 +290,11 @@ class LLMDocumentProcessor:
                 self.metadata_manager.save_metadata(metadata)
                 return None
             
+            reconstructed_xml = self.metadata_manager.create_output_filename(
+                docx_path, processing_id, "reconstructed", ".xml"
+            )
+            Path(reconstructed_xml).write_text(reconstructed_xml_content, encoding='utf-8')
+            
             metadata = self.metadata_manager.add_pipeline_step(metadata, "convert_to_xml", 
                                                               edited_txt_file, reconstructed_xml, "completed")
             
@@ -296,6 +334,72 @@ class LLMDocumentProcessor:
             self.metadata_manager.save_metadata(metadata)
             return None
     
+    def _stream_edit_to_file(self, edited_txt_file: str, anchored_text: str, instruction: str,
+                             temperature: float, max_tokens: int) -> str:
+        """Stream the LLM edit into edited_txt_file as it arrives and return the edited text"""
+        parts = []
+        try:
+            with open(edited_txt_file, 'w', encoding='utf-8', buffering=1) as f:
+                for piece in self.client.edit_document_stream(anchored_text, instruction, temperature, max_tokens):
+                    parts.append(piece)
+                    f.write(piece)
+        except StreamingUnavailableError as e:
+            # Only the single streaming request can fail this way, before anything
+            # is generated; chunked edits and mid-stream errors propagate instead
+            # of being sent again
+            print(f"⚠️  Streaming unavailable ({e}), falling back to a single request")
+            edited_text = self.client.edit_document(anchored_text, instruction, temperature, max_tokens)
+            Path(edited_txt_file).write_text(edited_text, encoding='utf-8')
+            return edited_text
+        
+        streamed_text = "".join(parts)
+        edited_text = streamed_text.strip()
+        if edited_text != streamed_text:
+            Path(edited_txt_file).write_text(edited_text, encoding='utf-8')
+        return edited_text
+    
+    def _prepare_anchored_text(self, docx_path: str) -> Optional[Tuple[str, Path]]:
+        """Extract XML from a DOCX and convert it to anchored text in memory"""
+        from core.anchored_text_cache import load_anchored_docx
+        
+        docx_path_obj = Path(docx_path)
+        if not docx_path_obj.exists():
+            print(f"❌ Document not found: {docx_path}")
+            return None
+        
+        _, anchored_text = load_anchored_docx(docx_path_obj)
+        if not anchored_text:
+            return None
+        
+        return anchored_text, docx_path_obj
+    
+    def _run_analysis(self, anchored_text: str, docx_path_obj: Path, analysis_type: str,
+                      temperature: float, max_tokens: int) -> str:
+        """Send anchored text to the LLM for one analysis type and save the result"""
+        # Deterministic runs are served from cache
+        cache_key = ResponseCache.make_key("analyze", self.client.provider.value, self.client.model, ANALYSIS_SYSTEM_PROMPT,
+                                           anchored_text, analysis_type, temperature, max_tokens)
+        use_cache = ResponseCache.is_cacheable(temperature)
+        analysis = self.response_cache.get(cache_key) if use_cache else None
+        if analysis is not None:
+            print(f"💾 Using cached LLM analysis ({analysis_type})")
+        else:
+            print(f"🤖 Sending to LLM for {analysis_type} analysis...")
+            analysis = self.client.analyze_document(
+                anchored_text, 
+                analysis_type, 
+                temperature, 
+                max_tokens
+            )
+            if use_cache:
+                self.response_cache.set(cache_key, analysis)
+        
+        # Save analysis
+        analysis_file = docx_path_obj.with_suffix(f'.{analysis_type}_analysis.txt')
+        analysis_file.write_text(analysis, encoding='utf-8')
+        print(f"📁 Analysis file: {analysis_file}")
+        return analysis
+    
     def analyze_document(
         self, 
         docx_path: str, 
@@ -318,53 +422,147 @@ class LLMDocumentProcessor:
         if not self.client:
             print("❌ No API client configured")
             return None
-            
-        docx_path_obj = Path(docx_path)
-        if not docx_path_obj.exists():
-            print(f"❌ Document not found: {docx_path}")
-            return None
         
         try:
-            print(f"📄 Analyzing document: {docx_path_obj.name}")
+            print(f"📄 Analyzing document: {Path(docx_path).name}")
             print(f"🔍 Analysis type: {analysis_type}")
             
-            # Extract XML and convert to anchored TXT
-            xml_file = extract_docx_xml(str(docx_path_obj))
-            if not xml_file:
-                return None
-            
-            anchored_txt_file = xml_to_anchored_txt(xml_file)
-            if not anchored_txt_file:
+            prepared = self._prepare_anchored_text(docx_path)
+            if not prepared:
                 return None
+            anchored_text, docx_path_obj = prepared
             
-            # Read anchored text
-            with open(anchored_txt_file, 'r', encoding='utf-8') as f:
-                anchored_text = f.read()
-            
-            # Send to LLM for analysis
-            print("🤖 Sending to LLM for analysis...")
-            analysis = self.client.analyze_document(
-                anchored_text, 
-                analysis_type, 
-                temperature, 
-                max_tokens
-            )
-            
-            # Save analysis
-            analysis_file = docx_path_obj.with_suffix(f'.{analysis_type}_analysis.txt')
-            with open(analysis_file, 'w', encoding='utf-8') as f:
-                f.write(analysis)
-            
+            analysis = self._run_analysis(anchored_text, docx_path_obj, analysis_type, temperature, max_tokens)
             print(f"✅ Analysis complete!")
-            print(f"📁 Analysis file: {analysis_file}")
             return analysis
             
         except Exception as e:
             print(f"❌ Document analysis failed: {e}")
             return None
+    
+    def analyze_document_multi(
+        self, 
+        docx_path: str, 
+        analysis_types: List[str],
+        temperature: float = 0.3,
+        max_tokens: int = 1000,
+        max_concurrency: Optional[int] = None
+    ) -> Optional[Dict[str, Optional[str]]]:
+        """
+        Run several analysis types on one document, extracting it only once
+        
+        Args:
+            docx_path: Path to input DOCX file
+            analysis_types: Types of analysis to run ("general", "legal", "technical", "summary")
+            temperature: LLM temperature setting
+            max_tokens: Maximum tokens for each LLM response
+            max_concurrency: Maximum analyses in flight (defaults to the provider limit)
+            
+        Returns:
+            Mapping of analysis type to results (None for failures), or None if extraction failed
+        """
+        if not self.client:
+            print("❌ No API client configured")
+            return None
+        
+        print(f"📄 Analyzing document: {Path(docx_path).name}")
+        print(f"🔍 Analysis types: {', '.join(analysis_types)}")
+        
+        try:
+            prepared = self._prepare_anchored_text(docx_path)
+        except Exception as e:
+            print(f"❌ Document analysis failed: {e}")
+            return None
+        if not prepared:
+            return None
+        anchored_text, docx_path_obj = prepared
+        
+        async def run_one(semaphore: asyncio.Semaphore, analysis_type: str) -> Optional[str]:
+            async with semaphore:
+                try:
+                    return await asyncio.to_thread(self._run_analysis, anchored_text, docx_path_obj,
+                                                   analysis_type, temperature, max_tokens)
+                except Exception as e:
+                    print(f"❌ {analysis_type} analysis failed: {e}")
+                    return None
+        
+        async def run_all() -> List[Optional[str]]:
+            semaphore = self._get_semaphore(max_concurrency)
+            return await asyncio.gather(*[run_one(semaphore, t) for t in analysis_types])
+        
+        results = dict(zip(analysis_types, asyncio.run(run_all())))
+        print(f"✅ Analysis complete! ({sum(r is not None for r in results.values())}/{len(results)} succeeded)")
+        return results
+
+    def _get_semaphore(self, max_concurrency: Optional[int] = None) -> asyncio.Semaphore:
+        """Create a semaphore bounding concurrent requests for the configured provider"""
+        if max_concurrency is None:
+            max_concurrency = config.max_concurrent_requests.get(self.provider, 4)
+        return asyncio.Semaphore(max_concurrency)
+    
+    async def _process_document_async(self, semaphore: asyncio.Semaphore, docx_path: str, 
+                                      instruction: str, **kwargs) -> Optional[str]:
+        """Run process_document in a worker thread, bounded by semaphore"""
+        async with semaphore:
+            return await asyncio.to_thread(self.process_document, docx_path, instruction, **kwargs)
+    
+    async def _analyze_document_async(self, semaphore: asyncio.Semaphore, docx_path: str, 
+                                      analysis_type: str, **kwargs) -> Optional[str]:
+        """Run analyze_document in a worker thread, bounded by semaphore"""
+        async with semaphore:
+            return await asyncio.to_thread(self.analyze_document, docx_path, analysis_type, **kwargs)
+    
+    async def process_documents(
+        self, 
+        docx_paths: List[str], 
+        instruction: str,
+        max_concurrency: Optional[int] = None,
+        **kwargs
+    ) -> List[Optional[str]]:
+        """
+        Process several documents concurrently through the LLM editing pipeline
+        
+        Args:
+            docx_paths: Paths to input DOCX files
+            instruction: Editing instruction for the LLM
+            max_concurrency: Maximum documents in flight (defaults to the provider limit)
+            **kwargs: Passed through to process_document
+            
+        Returns:
+            Output DOCX paths in the same order as docx_paths (None for failures)
+        """
+        semaphore = self._get_semaphore(max_concurrency)
+        return await asyncio.gather(*[
+            self._process_document_async(semaphore, path, instruction, **kwargs) for path in docx_paths
+        ])
+    
+    async def analyze_documents(
+        self, 
+        docx_paths: List[str], 
+        analysis_type: str = "general",
+        max_concurrency: Optional[int] = None,
+        **kwargs
+    ) -> List[Optional[str]]:
+        """
+        Analyze several documents concurrently
+        
+        Args:
+            docx_paths: Paths to input DOCX files
+            analysis_type: Type of analysis ("general", "legal", "technical", "summary")
+            max_concurrency: Maximum documents in flight (defaults to the provider limit)
+            **kwargs: Passed through to analyze_document
+            
+        Returns:
+            Analysis results in the same order as docx_paths (None for failures)
+        """
+        semaphore = self._get_semaphore(max_concurrency)
+        return await asyncio.gather(*[
+            self._analyze_document_async(semaphore, path, analysis_type, **kwargs) for path in docx_paths
+        ])
 
     def check_citations(self, docx_path: str, output_file: Optional[str] = None, 
-                       debug: bool = False, enable_reasoning: Optional[bool] = None) -> Optional[Dict[str, Any]]:
+                       debug: bool = False, enable_reasoning: Optional[bool] = None,
+                       max_workers: Optional[int] = None) -> Optional[Dict[str, Any]]:
         """
         Check legal citations in a document with metadata tracking
         
@@ -373,6 +571,7 @@ class LLMDocumentProcessor:
             output_file: Optional output file for results
             debug: Enable debug output
             enable_reasoning: Enable reasoning-based second-pass validation
+            max_workers: Maximum concurrent LLM requests for batched documents
             
         Returns:
             Citation analysis results
@@ -388,6 +587,7 @@ class LLMDocumentProcessor:
         try:
             if not self.citation_checker:
                 # Try to create citation checker with available provider
+                from llm.legal_citation_checker import LegalCitationChecker
                 available_providers = config.list_available_providers()
                 for provider_name, is_configured in available_providers.items():
                     if is_configured:
@@ -416,7 +616,8 @@ class LLMDocumentProcessor:
                                                               docx_path, None, "started")
             
             # Perform citation checking
-            results = self.citation_checker.check_citations_from_docx(docx_path, output_file, debug, enable_reasoning)
+            results = self.citation_checker.check_citations_from_docx(docx_path, output_file, debug, enable_reasoning,
+                                                                      max_workers)
             
             # Add completion step
             metadata = self.metadata_manager.add_pipeline_step(metadata, "citation_checking_complete", 
@@ -470,6 +671,7 @@ class LLMDocumentProcessor:
         try:
             if not self.citation_checker:
                 # Try to create citation checker with available provider
+                from llm.legal_citation_checker import LegalCitationChecker
                 available_providers = config.list_available_providers()
                 for provider_name, is_configured in available_providers.items():
                     if is_configured:
@@ -525,331 +727,412 @@ class LLMDocumentProcessor:
             self.metadata_manager.save_metadata(metadata)
             return None
 
-def main():
-    """Main CLI interface"""
-    if len(sys.argv) < 2:
-        print("LLM Document Processor")
-        print("=" * 40)
-        print("Usage:")
-        print("  python llm_document_processor.py setup <provider> <api_key> [model]")
-        print("  python llm_document_processor.py handshake")
-        print("  python llm_document_processor.py test")
-        print("  python llm_document_processor.py test-connection")
-        print("  python llm_document_processor.py edit <docx_file> <instruction>")
-        print("  python llm_document_processor.py analyze <docx_file> [analysis_type]")
-        print("  python llm_document_processor.py check-citations <docx_file> [--output-path <output.json>] [--debug] [--reasoning|--no-reasoning]")
-        print("  python llm_document_processor.py check-citations-batched <docx_file> [--output-path <output.json>] [--debug] [--batch-size <5>] [--context-overlap <2>] [--reasoning|--no-reasoning]")
-        print("  python llm_document_processor.py prompt-editor")
-        print("  python llm_document_processor.py metadata <docx_file> [--show-versions] [--show-latest] [--processing-id <id>]")
-        print("  python llm_document_processor.py cleanup-metadata [--days <30>]")
-        print("\nAnalysis types: general, legal, technical, summary")
-        print("Providers: llama, openai")
-        print("\nMetadata Commands:")
-        print("  metadata <docx_file> --show-versions    # Show all processing versions")
-        print("  metadata <docx_file> --show-latest      # Show latest processing version")
-        print("  metadata <docx_file> --processing-id <id> # Show specific processing metadata")
-        print("  cleanup-metadata --days <30>            # Clean up old metadata files")
-        # On startup, check handshake status
-        status = get_handshake_status()
-        if status == 'success':
-            print("🤝 Handshake status: SUCCESS (no need to retry)")
-        elif status == 'failed':
-            print("🤝 Handshake status: FAILED (no need to retry)")
+# Shared processor for the CLI so its LLM client (and HTTP connection pool) is reused
+_processor_singleton: Optional[LLMDocumentProcessor] = None
+
+def _get_processor() -> LLMDocumentProcessor:
+    """Get the shared LLMDocumentProcessor, creating it on first use"""
+    global _processor_singleton
+    if _processor_singleton is None:
+        _processor_singleton = LLMDocumentProcessor()
+    return _processor_singleton
+
+def _print_usage():
+    """Print CLI usage and check the handshake status"""
+    print("LLM Document Processor")
+    print("=" * 40)
+    print("Usage:")
+    print("  python llm_document_processor.py setup <provider> <api_key> [model]")
+    print("  python llm_document_processor.py handshake")
+    print("  python llm_document_processor.py test")
+    print("  python llm_document_processor.py test-connection")
+    print("  python llm_document_processor.py edit <docx_file> <instruction>")
+    print("  python llm_document_processor.py edit-batch <docx_dir> <instruction> [--concurrency <N>]")
+    print("  python llm_document_processor.py analyze <docx_file> [analysis_type]")
+    print("  python llm_document_processor.py analyze-multi <docx_file> <type1,type2,...>")
+    print("  python llm_document_processor.py check-citations <docx_file> [--output-path <output.json>] [--debug] [--reasoning|--no-reasoning]")
+    print("  python llm_document_processor.py check-citations-batched <docx_file> [--output-path <output.json>] [--debug] [--batch-size <5>] [--context-overlap <2>] [--reasoning|--no-reasoning]")
+    print("  python llm_document_processor.py prompt-editor")
+    print("  python llm_document_processor.py metadata <docx_file> [--show-versions] [--show-latest] [--processing-id <id>]")
+    print("  python llm_document_processor.py cleanup-metadata [--days <30>]")
+    print("\nAnalysis types: general, legal, technical, summary")
+    print("Providers: llama, openai")
+    print("\nMetadata Commands:")
+    print("  metadata <docx_file> --show-versions    # Show all processing versions")
+    print("  metadata <docx_file> --show-latest      # Show latest processing version")
+    print("  metadata <docx_file> --processing-id <id> # Show specific processing metadata")
+    print("  cleanup-metadata --days <30>            # Clean up old metadata files")
+    # On startup, check handshake status
+    status = get_handshake_status()
+    if status == 'success':
+        print("🤝 Handshake status: SUCCESS (no need to retry)")
+    elif status == 'failed':
+        print("🤝 Handshake status: FAILED (no need to retry)")
+    else:
+        print("🤝 Handshake status: UNKNOWN. Performing handshake...")
+        perform_handshake()
+
+def _require_configured_provider():
+    """Exit if no LLM provider has an API key configured"""
+    if not any(config.list_available_providers().values()):
+        print("❌ No API keys configured. Please configure at least one provider.")
+        sys.exit(1)
+
+def _cmd_setup(args: List[str]):
+    """Configure an API key for a provider"""
+    if len(args) < 2:
+        print("❌ Provider and API key required for setup")
+        print("Usage: python llm_document_processor.py setup <provider> <api_key> [model]")
+        sys.exit(1)
+    provider_name = args[0]
+    api_key = args[1]
+    model = args[2] if len(args) > 2 else None
+    
+    try:
+        provider = LLMProvider(provider_name)
+    except ValueError:
+        print(f"❌ Invalid provider: {provider_name}. Valid providers: llama, openai")
+        sys.exit(1)
+    
+    processor = _get_processor()
+    processor.setup_api_key(provider, api_key, model)
+    set_handshake_status('unknown')
+
+def _cmd_handshake(args: List[str]):
+    """Perform the API handshake and record its status"""
+    perform_handshake()
+    sys.exit(0)
+
+def _cmd_test_connection(args: List[str]):
+    """Test the connection to the configured LLM API"""
+    processor = _get_processor()
+    if not processor.client:
+        print("❌ No API keys configured. Please configure at least one provider.")
+        sys.exit(1)
+    
+    processor.test_api_connection()
+    sys.exit(0)
+
+def _cmd_metadata(args: List[str]):
+    """Show processing metadata for a document"""
+    if len(args) < 1:
+        print("❌ Please specify a DOCX file path")
+        sys.exit(1)
+    
+    docx_path = args[0]
+    processor = _get_processor()
+    
+    # Parse optional arguments
+    show_versions = False
+    show_latest = False
+    processing_id = None
+    
+    i = 1
+    while i < len(args):
+        if args[i] == "--show-versions":
+            show_versions = True
+            i += 1
+        elif args[i] == "--show-latest":
+            show_latest = True
+            i += 1
+        elif args[i] == "--processing-id" and i + 1 < len(args):
+            processing_id = args[i + 1]
+            i += 2
+        else:
+            i += 1
+    
+    # Handle metadata commands
+    if processing_id:
+        # Show specific processing metadata
+        metadata = processor.metadata_manager.load_metadata(processing_id)
+        if metadata:
+            processor.metadata_manager.print_processing_summary(metadata)
         else:
-            print("🤝 Handshake status: UNKNOWN. Performing handshake...")
-            perform_handshake()
+            print(f"❌ No metadata found for processing ID: {processing_id}")
+    elif show_versions:
+        # Show all versions
+        versions = processor.metadata_manager.find_document_versions(docx_path)
+        if versions:
+            print(f"\n📋 Found {len(versions)} processing versions for: {Path(docx_path).name}")
+            print("=" * 60)
+            for i, version in enumerate(versions, 1):
+                print(f"{i}. Processing ID: {version['processing_id']}")
+                print(f"   Start Time: {version['processing']['start_time']}")
+                print(f"   Duration: {version['processing'].get('duration_seconds', 0):.2f} seconds")
+                print(f"   Status: {version['status']}")
+                print(f"   Steps: {len(version['pipeline_steps'])}")
+                print()
+        else:
+            print(f"❌ No processing versions found for: {docx_path}")
+    elif show_latest:
+        # Show latest version
+        latest = processor.metadata_manager.get_latest_version(docx_path)
+        if latest:
+            processor.metadata_manager.print_processing_summary(latest)
+        else:
+            print(f"❌ No processing versions found for: {docx_path}")
+    else:
+        # Show latest version by default
+        latest = processor.metadata_manager.get_latest_version(docx_path)
+        if latest:
+            processor.metadata_manager.print_processing_summary(latest)
+        else:
+            print(f"❌ No processing versions found for: {docx_path}")
+
+def _cmd_cleanup_metadata(args: List[str]):
+    """Remove old metadata files"""
+    # Parse optional arguments
+    days_to_keep = 30
+    i = 0
+    while i < len(args):
+        if args[i] == "--days" and i + 1 < len(args):
+            days_to_keep = int(args[i + 1])
+            i += 2
+        else:
+            i += 1
+    
+    processor = _get_processor()
+    processor.metadata_manager.cleanup_old_metadata(days_to_keep)
+    sys.exit(0)
+
+def _cmd_test(args: List[str]):
+    """Test the configured LLM API"""
+    processor = _get_processor()
+    _require_configured_provider()
+    processor.test_api_connection()
+
+def _cmd_edit(args: List[str]):
+    """Edit a document with the LLM"""
+    processor = _get_processor()
+    if len(args) < 2:
+        print("❌ Document path and instruction required")
         sys.exit(1)
+    _require_configured_provider()
     
-    command = sys.argv[1].lower()
+    docx_path = args[0]
+    instruction = args[1]
+    processor.process_document(docx_path, instruction)
+
+def _cmd_edit_batch(args: List[str]):
+    """Edit every DOCX in a directory concurrently"""
+    processor = _get_processor()
+    if len(args) < 2:
+        print("❌ Document directory and instruction required")
+        sys.exit(1)
+    _require_configured_provider()
     
-    if command == "setup":
-        if len(sys.argv) < 4:
-            print("❌ Provider and API key required for setup")
-            print("Usage: python llm_document_processor.py setup <provider> <api_key> [model]")
-            sys.exit(1)
-        provider_name = sys.argv[2]
-        api_key = sys.argv[3]
-        model = sys.argv[4] if len(sys.argv) > 4 else None
-        
-        try:
-            provider = LLMProvider(provider_name)
-        except ValueError:
-            print(f"❌ Invalid provider: {provider_name}. Valid providers: llama, openai")
-            sys.exit(1)
-        
-        processor = LLMDocumentProcessor()
-        processor.setup_api_key(provider, api_key, model)
-        set_handshake_status('unknown')
-        
-    elif command == "handshake":
-        perform_handshake()
-        sys.exit(0)
+    docx_dir = Path(args[0])
+    instruction = args[1]
+    max_concurrency = None
+    if "--concurrency" in args:
+        i = args.index("--concurrency")
+        if i + 1 < len(args):
+            max_concurrency = int(args[i + 1])
     
-    elif command == "test-connection":
-        processor = LLMDocumentProcessor()
-        if not processor.client:
-            print("❌ No API keys configured. Please configure at least one provider.")
-            sys.exit(1)
-        
-        processor.test_api_connection()
-        sys.exit(0)
+    docx_paths = sorted(str(p) for p in docx_dir.glob("*.docx"))
+    if not docx_paths:
+        print(f"❌ No DOCX files found in: {docx_dir}")
+        sys.exit(1)
     
-    elif command == "metadata":
-        if len(sys.argv) < 3:
-            print("❌ Please specify a DOCX file path")
-            sys.exit(1)
-        
-        docx_path = sys.argv[2]
-        processor = LLMDocumentProcessor()
-        
-        # Parse optional arguments
-        show_versions = False
-        show_latest = False
-        processing_id = None
-        
-        i = 3
-        while i < len(sys.argv):
-            if sys.argv[i] == "--show-versions":
-                show_versions = True
-                i += 1
-            elif sys.argv[i] == "--show-latest":
-                show_latest = True
-                i += 1
-            elif sys.argv[i] == "--processing-id" and i + 1 < len(sys.argv):
-                processing_id = sys.argv[i + 1]
-                i += 2
-            else:
-                i += 1
-        
-        # Handle metadata commands
-        if processing_id:
-            # Show specific processing metadata
-            metadata = processor.metadata_manager.load_metadata(processing_id)
-            if metadata:
-                processor.metadata_manager.print_processing_summary(metadata)
-            else:
-                print(f"❌ No metadata found for processing ID: {processing_id}")
-        elif show_versions:
-            # Show all versions
-            versions = processor.metadata_manager.find_document_versions(docx_path)
-            if versions:
-                print(f"\n📋 Found {len(versions)} processing versions for: {Path(docx_path).name}")
-                print("=" * 60)
-                for i, version in enumerate(versions, 1):
-                    print(f"{i}. Processing ID: {version['processing_id']}")
-                    print(f"   Start Time: {version['processing']['start_time']}")
-                    print(f"   Duration: {version['processing'].get('duration_seconds', 0):.2f} seconds")
-                    print(f"   Status: {version['status']}")
-                    print(f"   Steps: {len(version['pipeline_steps'])}")
-                    print()
-            else:
-                print(f"❌ No processing versions found for: {docx_path}")
-        elif show_latest:
-            # Show latest version
-            latest = processor.metadata_manager.get_latest_version(docx_path)
-            if latest:
-                processor.metadata_manager.print_processing_summary(latest)
-            else:
-                print(f"❌ No processing versions found for: {docx_path}")
+    print(f"📂 Editing {len(docx_paths)} documents...")
+    outputs = asyncio.run(processor.process_documents(docx_paths, instruction, max_concurrency))
+    succeeded = sum(1 for output in outputs if output)
+    print(f"\n📊 Batch complete: {succeeded}/{len(docx_paths)} documents edited successfully")
+
+def _cmd_analyze(args: List[str]):
+    """Analyze a document with the LLM"""
+    processor = _get_processor()
+    if len(args) < 1:
+        print("❌ Document path required")
+        sys.exit(1)
+    _require_configured_provider()
+    
+    docx_path = args[0]
+    analysis_type = args[1] if len(args) > 1 else "general"
+    processor.analyze_document(docx_path, analysis_type)
+
+def _cmd_analyze_multi(args: List[str]):
+    """Run several analysis types on one document"""
+    processor = _get_processor()
+    if len(args) < 2:
+        print("❌ Usage: analyze-multi <docx_file> <type1,type2,...>")
+        sys.exit(1)
+    _require_configured_provider()
+    
+    docx_path = args[0]
+    analysis_types = [t.strip() for t in args[1].split(",") if t.strip()]
+    processor.analyze_document_multi(docx_path, analysis_types)
+
+def _cmd_check_citations(args: List[str]):
+    """Check legal citations in a document"""
+    if len(args) < 1:
+        print("❌ Please specify a DOCX file path")
+        return
+    
+    docx_path = args[0]
+    
+    # Parse optional arguments
+    output_file = None
+    debug = False
+    enable_reasoning = None  # None means use default setting
+    
+    i = 1
+    while i < len(args):
+        if args[i] == "--output-path" and i + 1 < len(args):
+            output_file = args[i + 1]
+            i += 2
+        elif args[i] == "--debug":
+            debug = True
+            i += 1
+        elif args[i] == "--reasoning":
+            enable_reasoning = True
+            i += 1
+        elif args[i] == "--no-reasoning":
+            enable_reasoning = False
+            i += 1
         else:
-            # Show latest version by default
-            latest = processor.metadata_manager.get_latest_version(docx_path)
-            if latest:
-                processor.metadata_manager.print_processing_summary(latest)
-            else:
-                print(f"❌ No processing versions found for: {docx_path}")
-    
-    elif command == "cleanup-metadata":
-        # Parse optional arguments
-        days_to_keep = 30
-        i = 2
-        while i < len(sys.argv):
-            if sys.argv[i] == "--days" and i + 1 < len(sys.argv):
-                days_to_keep = int(sys.argv[i + 1])
-                i += 2
-            else:
-                i += 1
-        
-        processor = LLMDocumentProcessor()
-        processor.metadata_manager.cleanup_old_metadata(days_to_keep)
-        sys.exit(0)
-    
-    processor = LLMDocumentProcessor()
-    
-    if command == "test":
-        available_providers = config.list_available_providers()
-        if not any(available_providers.values()):
-            print("❌ No API keys configured. Please configure at least one provider.")
-            sys.exit(1)
-        processor.test_api_connection()
-        
-    elif command == "edit":
-        if len(sys.argv) < 4:
-            print("❌ Document path and instruction required")
-            sys.exit(1)
-        available_providers = config.list_available_providers()
-        if not any(available_providers.values()):
-            print("❌ No API keys configured. Please configure at least one provider.")
-            sys.exit(1)
-        
-        docx_path = sys.argv[2]
-        instruction = sys.argv[3]
-        processor.process_document(docx_path, instruction)
-        
-    elif command == "analyze":
-        if len(sys.argv) < 3:
-            print("❌ Document path required")
-            sys.exit(1)
-        available_providers = config.list_available_providers()
-        if not any(available_providers.values()):
-            print("❌ No API keys configured. Please configure at least one provider.")
-            sys.exit(1)
-        
-        docx_path = sys.argv[2]
-        analysis_type = sys.argv[3] if len(sys.argv) > 3 else "general"
-        processor.analyze_document(docx_path, analysis_type)
-        
-    elif command == "check-citations":
-        if len(sys.argv) < 3:
-            print("❌ Please specify a DOCX file path")
+            # Treat as positional output file (backward compatibility)
+            if output_file is None:
+                output_file = args[i]
+            i += 1
+    
+    processor = _get_processor()
+    results = processor.check_citations(docx_path, output_file, debug, enable_reasoning)
+    
+    if results and processor.citation_checker:
+        processor.citation_checker.print_results_summary(results)
+
+def _cmd_check_citations_batched(args: List[str]):
+    """Check legal citations using batched context windows"""
+    if len(args) < 1:
+        print("❌ Please specify a DOCX file path")
+        return
+    
+    docx_path = args[0]
+    
+    # Parse optional arguments
+    output_file = None
+    debug = False
+    batch_size = 5
+    context_overlap = 2
+    enable_reasoning = None  # None means use default setting
+    
+    i = 1
+    while i < len(args):
+        if args[i] == "--output-path" and i + 1 < len(args):
+            output_file = args[i + 1]
+            i += 2
+        elif args[i] == "--debug":
+            debug = True
+            i += 1
+        elif args[i] == "--batch-size" and i + 1 < len(args):
+            batch_size = int(args[i + 1])
+            i += 2
+        elif args[i] == "--context-overlap" and i + 1 < len(args):
+            context_overlap = int(args[i + 1])
+            i += 2
+        elif args[i] == "--reasoning":
+            enable_reasoning = True
+            i += 1
+        elif args[i] == "--no-reasoning":
+            enable_reasoning = False
+            i += 1
+        else:
+            # Treat as positional output file (backward compatibility)
+            if output_file is None:
+                output_file = args[i]
+            i += 1
+    
+    processor = _get_processor()
+    results = processor.check_citations_batched(docx_path, output_file, debug, batch_size, context_overlap, enable_reasoning)
+    
+    if results and processor.citation_checker:
+        processor.citation_checker.print_results_summary(results)
+
+def _cmd_prompt_editor(args: List[str]):
+    """Manage LLM prompts"""
+    try:
+        from llm.prompt_editor import PromptEditor
+    except ImportError:
+        print("❌ Prompt editor not available")
+        print("💡 Create prompt_editor.py to enable prompt management")
+        return
+    
+    editor = PromptEditor()
+    
+    if len(args) < 1:
+        print("Prompt Editor - Manage LLM prompts")
+        print("=" * 40)
+        print("Usage:")
+        print("  python llm_document_processor.py prompt-editor list                    # List all prompts")
+        print("  python llm_document_processor.py prompt-editor show <prompt_name>      # Show prompt content")
+        print("  python llm_document_processor.py prompt-editor edit <prompt_name>      # Edit prompt file")
+        print("  python llm_document_processor.py prompt-editor create <prompt_name>    # Create new prompt")
+        print()
+        print("Examples:")
+        print("  python llm_document_processor.py prompt-editor list")
+        print("  python llm_document_processor.py prompt-editor show legal_citation")
+        print("  python llm_document_processor.py prompt-editor edit legal_citation")
+        return
+    
+    subcommand = args[0].lower()
+    
+    if subcommand == "list":
+        editor.list_prompts()
+    
+    elif subcommand == "show":
+        if len(args) < 2:
+            print("❌ Please specify a prompt name")
             return
-        
-        docx_path = sys.argv[2]
-        
-        # Parse optional arguments
-        output_file = None
-        debug = False
-        enable_reasoning = None  # None means use default setting
-        
-        i = 3
-        while i < len(sys.argv):
-            if sys.argv[i] == "--output-path" and i + 1 < len(sys.argv):
-                output_file = sys.argv[i + 1]
-                i += 2
-            elif sys.argv[i] == "--debug":
-                debug = True
-                i += 1
-            elif sys.argv[i] == "--reasoning":
-                enable_reasoning = True
-                i += 1
-            elif sys.argv[i] == "--no-reasoning":
-                enable_reasoning = False
-                i += 1
-            else:
-                # Treat as positional output file (backward compatibility)
-                if output_file is None:
-                    output_file = sys.argv[i]
-                i += 1
-        
-        processor = LLMDocumentProcessor()
-        results = processor.check_citations(docx_path, output_file, debug, enable_reasoning)
-        
-        if results and processor.citation_checker:
-            processor.citation_checker.print_results_summary(results)
+        editor.show_prompt(args[1])
     
-    elif command == "check-citations-batched":
-        if len(sys.argv) < 3:
-            print("❌ Please specify a DOCX file path")
+    elif subcommand == "edit":
+        if len(args) < 2:
+            print("❌ Please specify a prompt name")
             return
-        
-        docx_path = sys.argv[2]
-        
-        # Parse optional arguments
-        output_file = None
-        debug = False
-        batch_size = 5
-        context_overlap = 2
-        enable_reasoning = None  # None means use default setting
-        
-        i = 3
-        while i < len(sys.argv):
-            if sys.argv[i] == "--output-path" and i + 1 < len(sys.argv):
-                output_file = sys.argv[i + 1]
-                i += 2
-            elif sys.argv[i] == "--debug":
-                debug = True
-                i += 1
-            elif sys.argv[i] == "--batch-size" and i + 1 < len(sys.argv):
-                batch_size = int(sys.argv[i + 1])
-                i += 2
-            elif sys.argv[i] == "--context-overlap" and i + 1 < len(sys.argv):
-                context_overlap = int(sys.argv[i + 1])
-                i += 2
-            elif sys.argv[i] == "--reasoning":
-                enable_reasoning = True
-                i += 1
-            elif sys.argv[i] == "--no-reasoning":
-                enable_reasoning = False
-                i += 1
-            else:
-                # Treat as positional output file (backward compatibility)
-                if output_file is None:
-                    output_file = sys.argv[i]
-                i += 1
-        
-        processor = LLMDocumentProcessor()
-        results = processor.check_citations_batched(docx_path, output_file, debug, batch_size, context_overlap, enable_reasoning)
-        
-        if results and processor.citation_checker:
-            processor.citation_checker.print_results_summary(results)
+        custom_editor = args[2] if len(args) > 2 else None
+        editor.edit_prompt(args[1], custom_editor)
     
-    elif command == "prompt-editor":
-        try:
-            from llm.prompt_editor import PromptEditor
-            editor = PromptEditor()
-            
-            if len(sys.argv) < 3:
-                print("Prompt Editor - Manage LLM prompts")
-                print("=" * 40)
-                print("Usage:")
-                print("  python llm_document_processor.py prompt-editor list                    # List all prompts")
-                print("  python llm_document_processor.py prompt-editor show <prompt_name>      # Show prompt content")
-                print("  python llm_document_processor.py prompt-editor edit <prompt_name>      # Edit prompt file")
-                print("  python llm_document_processor.py prompt-editor create <prompt_name>    # Create new prompt")
-                print()
-                print("Examples:")
-                print("  python llm_document_processor.py prompt-editor list")
-                print("  python llm_document_processor.py prompt-editor show legal_citation")
-                print("  python llm_document_processor.py prompt-editor edit legal_citation")
-                return
-            
-            subcommand = sys.argv[2].lower()
-            
-            if subcommand == "list":
-                editor.list_prompts()
-            
-            elif subcommand == "show":
-                if len(sys.argv) < 4:
-                    print("❌ Please specify a prompt name")
-                    return
-                editor.show_prompt(sys.argv[3])
-            
-            elif subcommand == "edit":
-                if len(sys.argv) < 4:
-                    print("❌ Please specify a prompt name")
-                    return
-                custom_editor = sys.argv[4] if len(sys.argv) > 4 else None
-                editor.edit_prompt(sys.argv[3], custom_editor)
-            
-            elif subcommand == "create":
-                if len(sys.argv) < 4:
-                    print("❌ Please specify a prompt name")
-                    return
-                template = sys.argv[4] if len(sys.argv) > 4 else "basic"
-                editor.create_prompt(sys.argv[3], template)
-            
-            else:
-                print(f"❌ Unknown subcommand: {subcommand}")
-                print("Use 'list', 'show', 'edit', or 'create'")
-                
-        except ImportError:
-            print("❌ Prompt editor not available")
-            print("💡 Create prompt_editor.py to enable prompt management")
+    elif subcommand == "create":
+        if len(args) < 2:
+            print("❌ Please specify a prompt name")
+            return
+        template = args[2] if len(args) > 2 else "basic"
+        editor.create_prompt(args[1], template)
     
     else:
+        print(f"❌ Unknown subcommand: {subcommand}")
+        print("Use 'list', 'show', 'edit', or 'create'")
+
+COMMANDS: Dict[str, Callable[[List[str]], None]] = {
+    "setup": _cmd_setup,
+    "handshake": _cmd_handshake,
+    "test-connection": _cmd_test_connection,
+    "metadata": _cmd_metadata,
+    "cleanup-metadata": _cmd_cleanup_metadata,
+    "test": _cmd_test,
+    "edit": _cmd_edit,
+    "edit-batch": _cmd_edit_batch,
+    "analyze": _cmd_analyze,
+    "analyze-multi": _cmd_analyze_multi,
+    "check-citations": _cmd_check_citations,
+    "check-citations-batched": _cmd_check_citations_batched,
+    "prompt-editor": _cmd_prompt_editor,
+}
+
+def main():
+    """Main CLI interface"""
+    if len(sys.argv) < 2:
+        _print_usage()
+        sys.exit(1)
+    
+    command = sys.argv[1].lower()
+    handler = COMMANDS.get(command)
+    if handler is None:
         print(f"❌ Unknown command: {command}")
         print("Run without arguments to see usage information.")
         sys.exit(1)
+    handler(sys.argv[2:])
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
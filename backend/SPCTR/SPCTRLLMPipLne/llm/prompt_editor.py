@@ -2,38 +2,68 @@
 Prompt Editor - Manage LLM prompts
 """
 import os
+import shlex
+import subprocess
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Tuple, List, Dict
 
 class PromptEditor:
     """Simple prompt editor for managing LLM prompts"""
     
     def __init__(self):
         self.config_dir = Path(__file__).parent.parent / "config"
+        self._prompt_list_cache: Optional[Tuple[int, List[str]]] = None
+        self._content_cache: Dict[str, Tuple[int, int, str]] = {}
+    
+    def _get_prompt_names(self) -> List[str]:
+        """Get prompt names, rescanning the config directory only when it has changed"""
+        mtime = self.config_dir.stat().st_mtime_ns
+        if self._prompt_list_cache and self._prompt_list_cache[0] == mtime:
+            return self._prompt_list_cache[1]
+        with os.scandir(self.config_dir) as entries:
+            names = [entry.name[:-4] for entry in entries
+                     if entry.name.endswith(".txt") and entry.is_file()]
+        self._prompt_list_cache = (mtime, names)
+        return names
     
     def list_prompts(self):
         """List all available prompts"""
         print("Available prompts:")
-        for file in self.config_dir.glob("*.txt"):
-            print(f"  - {file.stem}")
+        for name in self._get_prompt_names():
+            print(f"  - {name}")
+    
+    def get_prompt(self, prompt_name: str) -> Optional[str]:
+        """Get prompt content, re-reading the file only when it has changed"""
+        prompt_file = self.config_dir / f"{prompt_name}.txt"
+        try:
+            stat = prompt_file.stat()
+        except FileNotFoundError:
+            self._content_cache.pop(prompt_name, None)
+            return None
+        cached = self._content_cache.get(prompt_name)
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            return cached[2]
+        content = prompt_file.read_text(encoding='utf-8')
+        self._content_cache[prompt_name] = (stat.st_mtime_ns, stat.st_size, content)
+        return content
     
     def show_prompt(self, prompt_name: str):
         """Show prompt content"""
-        prompt_file = self.config_dir / f"{prompt_name}.txt"
-        if prompt_file.exists():
-            with open(prompt_file, 'r', encoding='utf-8') as f:
-                print(f"Content of {prompt_name}:")
-                print("=" * 40)
-                print(f.read())
+        content = self.get_prompt(prompt_name)
+        if content is not None:
+            print(f"Content of {prompt_name}:")
+            print("=" * 40)
+            print(content)
         else:
             print(f"❌ Prompt '{prompt_name}' not found")
     
     def edit_prompt(self, prompt_name: str, custom_editor: Optional[str] = None):
-        """Edit prompt file"""
+        """Edit prompt file (custom_editor may be a full command line, e.g. "code --wait")"""
         prompt_file = self.config_dir / f"{prompt_name}.txt"
         if prompt_file.exists():
             editor = custom_editor or os.environ.get('EDITOR', 'notepad')
-            os.system(f"{editor} {prompt_file}")
+            subprocess.run(shlex.split(editor, posix=(os.name != "nt")) + [str(prompt_file)], check=False)
+            self._content_cache.pop(prompt_name, None)
         else:
             print(f"❌ Prompt '{prompt_name}' not found")
     
@@ -57,5 +87,7 @@ Assistant:"""
         
         with open(prompt_file, 'w', encoding='utf-8') as f:
             f.write(content)
+        self._prompt_list_cache = None
+        self._content_cache.pop(prompt_name, None)
         
         print(f"✅ Created prompt '{prompt_name}'") 
\ No newline at end of file
@@ -0,0 +1,56 @@
+"""
+Rate Limiter - Async token bucket for pacing API requests
+"""
+import asyncio
+import random
+import time
+from typing import Any, Optional
+
+class AsyncTokenBucket:
+    """Allows `rate` requests per `period` seconds, with bursts of up to `rate` requests"""
+
+    def __init__(self, rate: float, period: float = 60.0):
+        self.rate = float(rate)
+        self.period = period
+        self.tokens = self.rate
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate / self.period)
+        self.updated = now
+
+    async def acquire(self):
+        """Wait until a request may be sent"""
+        # Single event loop: nothing can run between the check and the decrement, so no lock is needed
+        while True:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) * self.period / self.rate)
+
+    def update_from_headers(self, headers: Optional[Any]):
+        """Shrink the bucket to the server's x-ratelimit-remaining-requests, if reported"""
+        remaining = headers.get("x-ratelimit-remaining-requests") if headers else None
+        if remaining is None:
+            return
+        try:
+            remaining = float(remaining)
+        except ValueError:
+            return
+        self._refill()
+        self.tokens = min(self.tokens, remaining)
+
+def retry_wait(error: Exception, attempt: int, max_wait: float = 60.0) -> float:
+    """Seconds to wait before retrying: the server's Retry-After if given, else jittered exponential backoff"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return min(float(headers["retry-after-ms"]) / 1000, max_wait)
+        if headers.get("retry-after"):
+            return min(float(headers["retry-after"]), max_wait)
+    except ValueError:
+        pass  # HTTP-date form; fall back to backoff
+    return min(2 ** attempt, max_wait) + random.uniform(0, 1)
@@ -2,17 +2,161 @@
 Reasoning-based Citation Validator - Second-pass analysis using OpenAI reasoning models
 """
 import json
+import logging
 import sys
 import re
+import time
+import asyncio
+import queue
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Union
+from typing import Dict, List, Optional, Any, Union, Iterator, Callable, Tuple
 from enum import Enum
 
+# Use orjson for citation file I/O if available
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Use RE2 (linear-time matching, no catastrophic backtracking) for the citation patterns if available
+try:
+    import re2 as _regex
+    RE2_AVAILABLE = True
+except ImportError:
+    _regex = re
+    RE2_AVAILABLE = False
+
 # Add parent directory to path to import from core and config folders
 sys.path.append(str(Path(__file__).parent.parent))
 
 from config.config import config, LLMProvider
-from llm.llm_client import LLMClient, LLMClientFactory
+from llm.response_cache import ResponseCache
+from llm.rate_limiter import AsyncTokenBucket, retry_wait
+
+# Per-citation progress goes through a logger, which the host application (or main())
+# configures; run-level summaries stay as plain prints like the rest of the pipeline
+logger = logging.getLogger(__name__)
+
+# Complex citation forms that might be false positives, compiled once as a single alternation
+COMPLEX_CITATION_RE = _regex.compile(
+    r'\d+ U\.S\.C\.'    # Federal statutes
+    r'|\d+ C\.F\.R\.'   # Federal regulations
+    r'|U\.S\. Const\.'   # Constitutional citations
+    r'|\d+ F\.\d+'       # Federal cases
+    r'|\d+ S\.Ct\.'      # Supreme Court cases
+)
+
+# Canonical Bluebook forms per citation type; a first-pass "Correct" citation that
+# matches one of these exactly is trusted without a reasoning call
+CANONICAL_FORMS = {
+    "statute-code": _regex.compile(r'^\d+ U\.S\.C\. §§? \d+[a-z]?(\([a-zA-Z0-9]+\))*( \(\d{4}\))?$'),
+    "regulation": _regex.compile(r'^\d+ C\.F\.R\. §§? \d+(\.\d+)*(\([a-zA-Z0-9]+\))*( \(\d{4}\))?$'),
+    "constitution": _regex.compile(r'^U\.S\. Const\. (art\. [IVX]+, § \d+(, cl\. \d+)?|amend\. [IVXL]+(, § \d+)?)$'),
+}
+
+# Attempts per reasoning call on rate limits / transient API errors, and the backoff cap
+MAX_REASONING_ATTEMPTS = 6
+MAX_RETRY_WAIT = 60.0
+
+# Per-occurrence fields that stay with a citation when it shares another occurrence's result
+POSITION_FIELDS = ('anchor', 'start_offset', 'end_offset')
+
+# Paragraph anchor tokens inserted by xml_to_anchored_txt
+ANCHOR_RE = _regex.compile(r'⟦P-\d+⟧')
+
+# Instructions shared by every reasoning request. They are sent first, as a system
+# message, so the identical prefix can be served from OpenAI's prompt cache; only
+# the citation and its context vary per request. OpenAI only caches prompts of
+# 1024+ tokens, so the rules and worked examples also keep the prefix above that.
+REASONING_SYSTEM_PROMPT = """You are a legal citation expert with deep knowledge of Bluebook citation rules. You need to perform a thorough analysis of a legal citation that was flagged for deeper review. The citation, its current analysis and its surrounding context follow in the user message.
+
+## YOUR TASK:
+Perform a comprehensive analysis of this citation considering:
+
+1. **Citation Identification**: Is this actually a legal citation that should be analyzed?
+2. **Citation Type**: What type of legal authority is this (case, statute, regulation, etc.)?
+3. **Bluebook Compliance**: Does it follow proper Bluebook formatting rules?
+4. **Error Detection**: Are there any formatting, punctuation, or structural errors?
+5. **Correction Accuracy**: If errors exist, what is the correct Bluebook format?
+
+## ANALYSIS REQUIREMENTS:
+- Think step-by-step through the Bluebook rules that apply
+- Consider the citation's context and purpose
+- Verify any legal references (case names, statutes, etc.)
+- Check for common Bluebook violations
+- Determine if this is a false positive (not actually a citation)
+
+## KEY BLUEBOOK RULES:
+- Case names: parties' surnames or entity names, "v." between them, abbreviated per Rule 10.2 and Table T6
+- Reporters: volume, reporter abbreviation (Table T1), first page, then pincite after a comma (Rules 3.2, 10.3)
+- Date parenthetical: the year, preceded by the court (Table T7) unless the reporter identifies it, as U.S. does (Rule 10.4)
+- Statutes: title, code abbreviation, "§" followed by a space, section number (Rules 6.2, 12.3)
+- Regulations: title, C.F.R., section and year of the code edition (Rule 14.2)
+- Court rules: Fed. R. Civ. P., Fed. R. Crim. P., Fed. R. Evid. with every abbreviation period (Rule 12.9.3)
+- Short forms: "Id." only for the immediately preceding authority; "Smith, 512 F.3d at 10" style for cases (Rules 4.1, 10.9)
+- Signals such as See, Cf. and But see are italicized and are not part of an error unless misused (Rule 1.2)
+
+## OUTPUT FORMAT:
+Return your analysis in this exact JSON format:
+
+```json
+{
+  "anchor": "<anchor_of_the_citation>",
+  "start_offset": <number>,
+  "end_offset": <number>,
+  "type": "<citation_type>",
+  "status": "Correct|Error|Uncertain|NotACitation",
+  "errors": ["error1", "error2"],
+  "orig": "<original_citation_exactly_as_given>",
+  "suggested": "<corrected_citation_or_identical_to_orig>",
+  "reasoning_summary": "<brief_explanation_of_your_analysis>"
+}
+```
+
+**Important Notes:**
+- If this is NOT a legal citation, set status to "NotACitation" and type to "other"
+- If the citation is correct, set suggested identical to orig
+- If uncertain, explain why in reasoning_summary
+- Be precise with start_offset and end_offset (character positions from anchor)
+- Only include actual Bluebook rule violations in errors array
+
+## EXAMPLES:
+Offsets count characters from the end of the anchor token, so the first character after ⟦P-00014⟧ is offset 0.
+
+Context: ⟦P-00014⟧When Defendant invoked the right to counsel, questioning had to stop. Miranda v. Arizona, 384 U.S. 436, 474 (1966).
+Citation: "Miranda v. Arizona, 384 U.S. 436, 474 (1966)"
+Answer: {"anchor": "P-00014", "start_offset": 70, "end_offset": 114, "type": "case", "status": "Correct", "errors": [], "orig": "Miranda v. Arizona, 384 U.S. 436, 474 (1966)", "suggested": "Miranda v. Arizona, 384 U.S. 436, 474 (1966)", "reasoning_summary": "Full case citation with parties, volume, U.S. reporter, first page, pincite and year; no violations."}
+
+Context: ⟦P-00021⟧Counsel's performance is measured against an objective standard. Strickland v. Washington, 466 US 668, 688 (1984).
+Citation: "Strickland v. Washington, 466 US 668, 688 (1984)"
+Answer: {"anchor": "P-00021", "start_offset": 65, "end_offset": 113, "type": "case", "status": "Error", "errors": ["Rule 10.3 / T1 – United States Reports is abbreviated U.S."], "orig": "Strickland v. Washington, 466 US 668, 688 (1984)", "suggested": "Strickland v. Washington, 466 U.S. 668, 688 (1984)", "reasoning_summary": "Real Supreme Court case; only the reporter abbreviation lacks periods."}
+
+Context: ⟦P-00027⟧The Seventh Circuit first addressed the issue in United States v. Booker, 375 F.3d 508 (2004).
+Citation: "United States v. Booker, 375 F.3d 508 (2004)"
+Answer: {"anchor": "P-00027", "start_offset": 49, "end_offset": 93, "type": "case", "status": "Error", "errors": ["Rule 10.4 – court of decision missing from the date parenthetical"], "orig": "United States v. Booker, 375 F.3d 508 (2004)", "suggested": "United States v. Booker, 375 F.3d 508 (7th Cir. 2004)", "reasoning_summary": "F.3d does not identify the court, and the sentence names the Seventh Circuit, so the parenthetical needs 7th Cir."}
+
+Context: ⟦P-00033⟧Plaintiff brings this action under 42 U.S.C. §1983 against the county.
+Citation: "42 U.S.C. §1983"
+Answer: {"anchor": "P-00033", "start_offset": 35, "end_offset": 50, "type": "statute-code", "status": "Error", "errors": ["Rule 6.2 – space required after §"], "orig": "42 U.S.C. §1983", "suggested": "42 U.S.C. § 1983", "reasoning_summary": "Federal code citation; the section symbol must be followed by a space."}
+
+Context: ⟦P-00040⟧Defendant filed her notice pursuant to Fed. R. Crim P. 12.2(a).
+Citation: "Fed. R. Crim P. 12.2(a)"
+Answer: {"anchor": "P-00040", "start_offset": 39, "end_offset": 62, "type": "rule/procedure", "status": "Error", "errors": ["Rule 12.9.3 – Criminal is abbreviated Crim."], "orig": "Fed. R. Crim P. 12.2(a)", "suggested": "Fed. R. Crim. P. 12.2(a)", "reasoning_summary": "Federal rule citation; the abbreviation Crim needs a period."}
+
+Context: ⟦P-00046⟧The same reasoning applies here. Smith, 512 F.3d at 10.
+Citation: "Smith, 512 F.3d at 10"
+Answer: {"anchor": "P-00046", "start_offset": 33, "end_offset": 54, "type": "case", "status": "Uncertain", "errors": [], "orig": "Smith, 512 F.3d at 10", "suggested": "Smith, 512 F.3d at 10", "reasoning_summary": "Short form is well formed under Rule 10.9, but the full citation is not in the context, so the case and pincite cannot be verified."}
+
+Context: ⟦P-00052⟧For the reasons explained in Part II below, the motion is granted.
+Citation: "Part II"
+Answer: {"anchor": "P-00052", "start_offset": 29, "end_offset": 36, "type": "other", "status": "NotACitation", "errors": [], "orig": "Part II", "suggested": "Part II", "reasoning_summary": "Internal cross-reference to a section of this order, not a citation to legal authority."}
+"""
+
+# Characters of surrounding text included on each side of a citation
+DEFAULT_CONTEXT_CHARS = 60
 
 class ReasoningEffort(Enum):
     """Reasoning effort levels for OpenAI reasoning models"""
@@ -23,10 +167,18 @@ class ReasoningEffort(Enum):
 class ReasoningCitationValidator:
     """Second-pass citation validator using OpenAI reasoning models"""
     
-    def __init__(self, api_key: Optional[str] = None, model: str = "o4-mini"):
+    def __init__(self, api_key: Optional[str] = None, model: str = "o4-mini", max_concurrency: int = 8,
+                 context_chars: int = DEFAULT_CONTEXT_CHARS):
         self.api_key = api_key or config.get_api_key(LLMProvider.OPENAI)
         self.model = model
+        self.max_concurrency = max_concurrency
+        self.context_chars = context_chars
         self.client = None
+        self._retryable_errors = ()
+        self.response_cache = ResponseCache()
+        rpm = config.requests_per_minute.get(LLMProvider.OPENAI)
+        # Shared across runs so back-to-back batches stay within the per-minute budget
+        self.rate_limiter = AsyncTokenBucket(rpm) if rpm else None
         
         if not self.api_key:
             print("❌ OpenAI API key required for reasoning models")
@@ -34,8 +186,11 @@ class ReasoningCitationValidator:
         
         # Initialize OpenAI client for reasoning models
         try:
-            from openai import OpenAI
+            from openai import OpenAI, AsyncOpenAI, RateLimitError, APIConnectionError, InternalServerError
             self.client = OpenAI(api_key=self.api_key)
+            self._async_client_class = AsyncOpenAI
+            # APITimeoutError is a subclass of APIConnectionError
+            self._retryable_errors = (RateLimitError, APIConnectionError, InternalServerError)
             print(f"✅ Reasoning validator initialized with model: {model}")
         except ImportError:
             print("❌ OpenAI SDK not installed. Please install with: pip install openai")
@@ -68,31 +223,90 @@ class ReasoningCitationValidator:
         if not citations:
             return []
         
+        return asyncio.run(self.avalidate_citations_with_reasoning(citations, original_text, effort, debug))
+    
+    async def avalidate_citations_with_reasoning(
+        self, 
+        citations: List[Dict[str, Any]], 
+        original_text: str,
+        effort: ReasoningEffort = ReasoningEffort.MEDIUM,
+        debug: bool = False,
+        max_concurrency: Optional[int] = None,
+        on_result: Optional[Callable[[int, Dict[str, Any]], None]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Validate citations concurrently, with at most max_concurrency reasoning requests in flight
+        
+        on_result(index, citation) is called as each citation completes, but only for
+        citations that were validated or needed no reasoning; failed ones are left out.
+        
+        Returns:
+            Validated citations in the same order as the input (failed ones unchanged)
+        """
+        if not self.client:
+            print("❌ No OpenAI client available")
+            return citations
+        
+        if not citations:
+            return []
+        
         print(f"🧠 Validating {len(citations)} citations with reasoning model...")
         
-        validated_citations = []
+        semaphore = asyncio.Semaphore(max_concurrency or self.max_concurrency)
+        anchor_index = self._build_anchor_index(original_text)
+        validated_citations: List[Optional[Dict[str, Any]]] = [None] * len(citations)
         
-        for i, citation in enumerate(citations):
-            if debug:
-                print(f"   📝 Validating citation {i+1}/{len(citations)}: {citation.get('orig', 'Unknown')}")
+        # The async client's connection pool is tied to the running event loop,
+        # so create it per run rather than once per validator
+        # (SDK retries are disabled; _create_with_retry handles backoff itself)
+        async with self._async_client_class(api_key=self.api_key, max_retries=0) as aclient:
+            # Repeated citations (same orig, type and status) share a single reasoning call
+            shared: Dict[tuple, asyncio.Future] = {}
             
-            # Determine if this citation needs reasoning validation
-            needs_reasoning = self._needs_reasoning_validation(citation)
-            
-            if needs_reasoning:
-                validated_citation = self._validate_single_citation_with_reasoning(
-                    citation, original_text, effort, debug
+            async def reason(citation: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+                context = self._extract_citation_context(
+                    original_text, citation.get('anchor', ''), citation.get('orig', ''), anchor_index
                 )
-                if validated_citation:
-                    validated_citations.append(validated_citation)
-                else:
-                    # Fallback to original citation if reasoning fails
-                    validated_citations.append(citation)
-            else:
-                # Citation is clear, no reasoning needed
-                validated_citations.append(citation)
+                async with semaphore:
+                    return await self._validate_single_citation_with_reasoning(
+                        aclient, citation, original_text, effort, debug, context
+                    )
+            
+            async def validate(i: int, citation: Dict[str, Any]) -> Tuple[int, Optional[Dict[str, Any]]]:
+                logger.debug("   📝 Validating citation %d/%d: %s", i + 1, len(citations), citation.get('orig', 'Unknown'))
+                
+                # Citations that are clear need no reasoning
+                if not self._needs_reasoning_validation(citation):
+                    return i, citation
+                
+                key = (citation.get('orig', ''), citation.get('type', ''), citation.get('status', ''))
+                if key not in shared:
+                    shared[key] = asyncio.ensure_future(reason(citation))
+                try:
+                    validated_citation = await shared[key]
+                except Exception as e:
+                    logger.error("   ❌ Reasoning validation failed: %s", e)
+                    return i, None
+                return i, self._reanchor(validated_citation, citation) if validated_citation else None
+            
+            tasks = [asyncio.ensure_future(validate(i, citation)) for i, citation in enumerate(citations)]
+            try:
+                for next_done in asyncio.as_completed(tasks):
+                    i, validated_citation = await next_done
+                    if validated_citation is None:
+                        continue
+                    validated_citations[i] = validated_citation
+                    if on_result:
+                        on_result(i, validated_citation)
+            finally:
+                for task in tasks:
+                    task.cancel()
         
-        print(f"✅ Reasoning validation complete: {len(validated_citations)} citations processed")
+        failed = sum(1 for validated, citation in zip(validated_citations, citations) if validated is None)
+        validated_citations = [validated or citation for validated, citation in zip(validated_citations, citations)]
+        
+        print(f"✅ Reasoning validation complete: {len(validated_citations)} citations processed "
+              f"({len(shared)} unique sent for reasoning, {failed} failed)")
         return validated_citations
     
     def _needs_reasoning_validation(self, citation: Dict[str, Any]) -> bool:
@@ -107,6 +321,10 @@ class ReasoningCitationValidator:
         orig = citation.get('orig', '')
         suggested = citation.get('suggested', '')
         
+        # Correct citations already in canonical form need no reasoning
+        if status == 'Correct' and self._is_canonical_form(orig, citation.get('type', '')):
+            return False
+        
         # Cases that need reasoning:
         
         # 1. Uncertain status
@@ -122,17 +340,8 @@ class ReasoningCitationValidator:
             return True
         
         # 4. Complex citations that might be false positives
-        complex_patterns = [
-            r'\d+ U\.S\.C\.',  # Federal statutes
-            r'\d+ C\.F\.R\.',  # Federal regulations
-            r'U\.S\. Const\.',  # Constitutional citations
-            r'\d+ F\.\d+',      # Federal cases
-            r'\d+ S\.Ct\.',     # Supreme Court cases
-        ]
-        
-        for pattern in complex_patterns:
-            if re.search(pattern, orig):
-                return True
+        if COMPLEX_CITATION_RE.search(orig):
+            return True
         
         # 5. Citations with multiple potential interpretations
         if len(orig.split()) > 8:  # Long citations
@@ -140,47 +349,55 @@ class ReasoningCitationValidator:
         
         return False
     
-    def _validate_single_citation_with_reasoning(
+    def _is_canonical_form(self, orig: str, citation_type: str) -> bool:
+        """Check if a citation exactly matches the canonical Bluebook form for its type"""
+        pattern = CANONICAL_FORMS.get(citation_type)
+        return bool(pattern and pattern.match(orig))
+    
+    async def _validate_single_citation_with_reasoning(
         self, 
+        aclient: Any,
         citation: Dict[str, Any], 
         original_text: str,
         effort: ReasoningEffort,
-        debug: bool = False
+        debug: bool = False,
+        context: Optional[str] = None
     ) -> Optional[Dict[str, Any]]:
         """
         Validate a single citation using reasoning model
+        
+        Returns None if the reasoning call failed or its reply was unusable.
         """
-        if not self.client:
-            print(f"      ❌ No OpenAI client available")
-            return citation
-            
         try:
-            # Create reasoning prompt
-            prompt = self._create_reasoning_prompt(citation, original_text)
+            if context is None:
+                context = self._extract_citation_context(original_text, citation.get('anchor', ''), citation.get('orig', ''))
+            cache_key = self._reasoning_cache_key(citation, context, effort)
+            cached = self._get_cached_validation(cache_key, citation)
+            if cached:
+                logger.debug("      💾 Using cached reasoning result")
+                return cached
             
-            if debug:
-                print(f"      🤔 Sending to reasoning model with {effort.value} effort...")
+            logger.debug("      🤔 Sending to reasoning model with %s effort...", effort.value)
             
             # Call OpenAI reasoning API
-            response = self.client.responses.create(
-                model=self.model,
-                reasoning={"effort": effort.value},
-                input=[
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                max_output_tokens=4000  # Reserve space for reasoning
+            response = await self._create_with_retry(
+                aclient, self._build_reasoning_request(citation, original_text, effort, context)
             )
             
+            if logger.isEnabledFor(logging.DEBUG):
+                usage = getattr(response, "usage", None)
+                details = getattr(usage, "input_tokens_details", None)
+                if details is not None:
+                    logger.debug("      💾 Prompt cache: %s/%s input tokens cached",
+                                 details.cached_tokens, usage.input_tokens)
+            
             if response.status == "incomplete":
-                print(f"      ⚠️  Reasoning incomplete - ran out of tokens")
-                return citation
+                logger.warning("      ⚠️  Reasoning incomplete - ran out of tokens")
+                return None
             
             if not response.output_text:
-                print(f"      ❌ No output from reasoning model")
-                return citation
+                logger.error("      ❌ No output from reasoning model")
+                return None
             
             # Parse reasoning response
             validated_citation = self._parse_reasoning_response(
@@ -188,18 +405,77 @@ class ReasoningCitationValidator:
             )
             
             if validated_citation:
-                if debug:
-                    print(f"      ✅ Reasoning validation successful")
+                logger.debug("      ✅ Reasoning validation successful")
+                self.response_cache.set(cache_key, json.dumps(validated_citation))
                 return validated_citation
             else:
-                print(f"      ❌ Failed to parse reasoning response")
-                return citation
+                logger.error("      ❌ Failed to parse reasoning response")
+                return None
                 
         except Exception as e:
-            print(f"      ❌ Reasoning validation failed: {e}")
-            return citation
+            logger.error("      ❌ Reasoning validation failed: %s", e)
+            return None
+    
+    async def _create_with_retry(self, aclient: Any, request: Dict[str, Any]) -> Any:
+        """Call the Responses API, backing off on rate limits and transient errors"""
+        for attempt in range(MAX_REASONING_ATTEMPTS):
+            if self.rate_limiter:
+                await self.rate_limiter.acquire()
+            try:
+                return await aclient.responses.create(**request)
+            except self._retryable_errors as e:
+                if attempt == MAX_REASONING_ATTEMPTS - 1:
+                    raise
+                if self.rate_limiter:
+                    self.rate_limiter.update_from_headers(getattr(getattr(e, "response", None), "headers", None))
+                wait_time = retry_wait(e, attempt, MAX_RETRY_WAIT)
+                logger.warning("      ⏳ %s, retrying in %.1f seconds...", type(e).__name__, wait_time)
+                await asyncio.sleep(wait_time)
+    
+    def _reasoning_cache_key(self, citation: Dict[str, Any], context: str, effort: ReasoningEffort) -> str:
+        """Cache key for a reasoning result; the anchor is excluded so repeated citations share results"""
+        return ResponseCache.make_key(
+            "reasoning", self.model, effort.value,
+            citation.get('orig', ''), citation.get('type', ''), citation.get('status', ''),
+            json.dumps(citation.get('errors', [])), citation.get('suggested', ''), context
+        )
     
-    def _create_reasoning_prompt(self, citation: Dict[str, Any], original_text: str) -> str:
+    def _get_cached_validation(self, cache_key: str, citation: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Get a cached reasoning result re-anchored to this citation, or None"""
+        cached = self.response_cache.get(cache_key)
+        if cached is None:
+            return None
+        return self._reanchor(json.loads(cached), citation)
+    
+    def _reanchor(self, validated_citation: Dict[str, Any], citation: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy a validated result onto another occurrence, keeping that occurrence's position"""
+        result = dict(validated_citation)
+        for field in POSITION_FIELDS:
+            if field in citation:
+                result[field] = citation[field]
+        return result
+    
+    def _build_reasoning_request(self, citation: Dict[str, Any], original_text: str,
+                                 effort: ReasoningEffort, context: Optional[str] = None) -> Dict[str, Any]:
+        """Build the Responses API request body for one citation"""
+        return {
+            "model": self.model,
+            "reasoning": {"effort": effort.value},
+            "input": [
+                {
+                    "role": "system",
+                    "content": REASONING_SYSTEM_PROMPT
+                },
+                {
+                    "role": "user",
+                    "content": self._create_reasoning_prompt(citation, original_text, context)
+                }
+            ],
+            "max_output_tokens": 4000  # Reserve space for reasoning
+        }
+    
+    def _create_reasoning_prompt(self, citation: Dict[str, Any], original_text: str,
+                                 context: Optional[str] = None) -> str:
         """
         Create a comprehensive reasoning prompt for citation validation
         """
@@ -211,100 +487,62 @@ class ReasoningCitationValidator:
         suggested = citation.get('suggested', '')
         
         # Extract context around the citation
-        context = self._extract_citation_context(original_text, anchor, orig)
+        if context is None:
+            context = self._extract_citation_context(original_text, anchor, orig)
         
-        prompt = f"""
-You are a legal citation expert with deep knowledge of Bluebook citation rules. You need to perform a thorough analysis of a legal citation that was flagged for deeper review.
-
-## CITATION TO ANALYZE:
-- **Original Citation**: "{orig}"
-- **Current Status**: {status}
-- **Citation Type**: {citation_type}
-- **Current Errors**: {errors}
-- **Current Suggestion**: "{suggested}"
-
-## CONTEXT:
-The citation appears in this context:
-{context}
-
-## YOUR TASK:
-Perform a comprehensive analysis of this citation considering:
-
-1. **Citation Identification**: Is this actually a legal citation that should be analyzed?
-2. **Citation Type**: What type of legal authority is this (case, statute, regulation, etc.)?
-3. **Bluebook Compliance**: Does it follow proper Bluebook formatting rules?
-4. **Error Detection**: Are there any formatting, punctuation, or structural errors?
-5. **Correction Accuracy**: If errors exist, what is the correct Bluebook format?
-
-## ANALYSIS REQUIREMENTS:
-- Think step-by-step through the Bluebook rules that apply
-- Consider the citation's context and purpose
-- Verify any legal references (case names, statutes, etc.)
-- Check for common Bluebook violations
-- Determine if this is a false positive (not actually a citation)
-
-## OUTPUT FORMAT:
-Return your analysis in this exact JSON format:
-
-```json
-{{
-  "anchor": "{anchor}",
-  "start_offset": <number>,
-  "end_offset": <number>,
-  "type": "<citation_type>",
-  "status": "Correct|Error|Uncertain|NotACitation",
-  "errors": ["error1", "error2"],
-  "orig": "{orig}",
-  "suggested": "<corrected_citation_or_identical_to_orig>",
-  "reasoning_summary": "<brief_explanation_of_your_analysis>"
-}}
-```
-
-**Important Notes:**
-- If this is NOT a legal citation, set status to "NotACitation" and type to "other"
-- If the citation is correct, set suggested identical to orig
-- If uncertain, explain why in reasoning_summary
-- Be precise with start_offset and end_offset (character positions from anchor)
-- Only include actual Bluebook rule violations in errors array
-"""
+        return "".join((
+            "## CITATION TO ANALYZE:\n- **Anchor**: ", str(anchor),
+            '\n- **Original Citation**: "', str(orig),
+            '"\n- **Current Status**: ', str(status),
+            "\n- **Citation Type**: ", str(citation_type),
+            "\n- **Current Errors**: ", str(errors),
+            '\n- **Current Suggestion**: "', str(suggested),
+            '"\n\n## CONTEXT:\nThe citation appears in this context:\n', context, "\n",
+        ))
+    
+    def _build_anchor_index(self, original_text: str) -> Dict[str, int]:
+        """
+        Map each anchor ID to its first offset in one pass over the text
         
-        return prompt
+        Keys are bare IDs ("P-00002"), as first-pass citations carry them, and offsets
+        match original_text.find(anchor_id) so indexed and fallback lookups agree.
+        """
+        anchor_index = {}
+        for match in ANCHOR_RE.finditer(original_text):
+            anchor_index.setdefault(match.group()[1:-1], match.start() + 1)
+        return anchor_index
     
-    def _extract_citation_context(self, original_text: str, anchor: str, citation: str) -> str:
+    def _extract_citation_context(self, original_text: str, anchor: str, citation: str,
+                                  anchor_index: Optional[Dict[str, int]] = None) -> str:
         """
         Extract context around a citation for better analysis
+        
+        anchor_index (from _build_anchor_index) avoids rescanning the text for each citation.
         """
         try:
-            # Find the anchor in the text
-            anchor_pattern = re.escape(anchor)
-            anchor_match = re.search(anchor_pattern, original_text)
-            
-            if not anchor_match:
+            # Find the anchor in the text (both are literal strings, so plain find is enough)
+            anchor_start = anchor_index.get(anchor.strip('⟦⟧')) if anchor_index else None
+            if anchor_start is None:
+                if anchor_index:
+                    logger.debug("      ⚠️ Anchor %s not in index, scanning text", anchor)
+                anchor_start = original_text.find(anchor)
+            if anchor_start < 0:
                 return f"Context not found for anchor {anchor}"
             
-            anchor_start = anchor_match.start()
-            
             # Find the citation near the anchor
-            citation_pattern = re.escape(citation)
-            citation_match = re.search(citation_pattern, original_text[anchor_start:anchor_start+1000])
-            
-            if not citation_match:
+            citation_start = original_text.find(citation, anchor_start, anchor_start + 1000)
+            if citation_start < 0:
                 return f"Citation '{citation}' not found near anchor {anchor}"
+            citation_end = citation_start + len(citation)
             
-            citation_start = anchor_start + citation_match.start()
-            citation_end = anchor_start + citation_match.end()
-            
-            # Extract context (200 chars before and after)
-            context_start = max(0, citation_start - 200)
-            context_end = min(len(original_text), citation_end + 200)
+            # Extract context (context_chars before and after)
+            context_start = max(0, citation_start - self.context_chars)
+            context_end = min(len(original_text), citation_end + self.context_chars)
             
-            context = original_text[context_start:context_end]
-            
-            # Highlight the citation in context
-            citation_in_context = context[citation_start - context_start:citation_end - context_start]
-            highlighted_context = context.replace(citation_in_context, f"[{citation_in_context}]")
-            
-            return highlighted_context
+            # Highlight the citation in context by slicing at its exact position
+            return "".join((original_text[context_start:citation_start], "[",
+                            original_text[citation_start:citation_end], "]",
+                            original_text[citation_end:context_end]))
             
         except Exception as e:
             return f"Error extracting context: {e}"
@@ -314,29 +552,27 @@ Return your analysis in this exact JSON format:
         Parse the reasoning model's response and extract validated citation
         """
         try:
-            # Try to extract JSON from the response
-            json_match = re.search(r'```json\s*(\{.*?\})\s*```', response_text, re.DOTALL)
-            if json_match:
-                json_content = json_match.group(1)
-            else:
-                # Try to find JSON object directly
-                json_match = re.search(r'(\{.*?\})', response_text, re.DOTALL)
-                if json_match:
-                    json_content = json_match.group(1)
-                else:
-                    if debug:
-                        print(f"         ❌ No JSON found in response")
-                    return None
+            # Take the ```json fence if present, then the outermost {...} inside it;
+            # unlike a non-greedy regex this keeps nested objects intact
+            start = response_text.find('```json')
+            if start != -1:
+                end = response_text.find('```', start + 7)
+                response_text = response_text[start + 7:end if end != -1 else len(response_text)]
+            start = response_text.find('{')
+            end = response_text.rfind('}')
+            if start == -1 or end < start:
+                logger.debug("         ❌ No JSON found in response")
+                return None
             
             # Parse JSON
-            validated_citation = json.loads(json_content)
+            json_content = response_text[start:end + 1]
+            validated_citation = orjson.loads(json_content) if ORJSON_AVAILABLE else json.loads(json_content)
             
             # Validate required fields
             required_fields = ['anchor', 'type', 'status', 'orig', 'suggested']
             for field in required_fields:
                 if field not in validated_citation:
-                    if debug:
-                        print(f"         ❌ Missing required field: {field}")
+                    logger.debug("         ❌ Missing required field: %s", field)
                     return None
             
             # Ensure anchor matches original
@@ -358,51 +594,254 @@ Return your analysis in this exact JSON format:
             return validated_citation
             
         except json.JSONDecodeError as e:
-            if debug:
-                print(f"         ❌ JSON parsing error: {e}")
+            logger.debug("         ❌ JSON parsing error: %s", e)
             return None
         except Exception as e:
-            if debug:
-                print(f"         ❌ Response parsing error: {e}")
+            logger.debug("         ❌ Response parsing error: %s", e)
             return None
     
-    def batch_validate_with_reasoning(
+    def validate_with_batch_api(
         self, 
         citations: List[Dict[str, Any]], 
         original_text: str,
         effort: ReasoningEffort = ReasoningEffort.MEDIUM,
-        batch_size: int = 5,
-        debug: bool = False
+        debug: bool = False,
+        poll_interval: int = 30,
+        on_result: Optional[Callable[[int, Dict[str, Any]], None]] = None
     ) -> List[Dict[str, Any]]:
         """
-        Validate citations in batches to manage API costs and rate limits
+        Validate citations through the OpenAI Batch API
+        
+        Batch jobs are billed at half price and are not subject to the real-time
+        rate limits, but can take up to 24 hours. Intended for offline runs.
+        on_result is called as in avalidate_citations_with_reasoning.
         """
-        if not citations:
-            return []
+        if not self.client:
+            print("❌ No OpenAI client available")
+            return citations
         
-        print(f"📦 Batch validating {len(citations)} citations...")
+        validated_citations = list(citations)
+        indices = []
+        contexts = {}
+        cache_keys = {}
+        anchor_index = self._build_anchor_index(original_text)
+        for i, citation in enumerate(citations):
+            if not self._needs_reasoning_validation(citation):
+                if on_result:
+                    on_result(i, citation)
+                continue
+            contexts[i] = self._extract_citation_context(
+                original_text, citation.get('anchor', ''), citation.get('orig', ''), anchor_index
+            )
+            cache_keys[i] = self._reasoning_cache_key(citation, contexts[i], effort)
+            cached = self._get_cached_validation(cache_keys[i], citation)
+            if cached:
+                validated_citations[i] = cached
+                if on_result:
+                    on_result(i, cached)
+            else:
+                indices.append(i)
         
-        validated_citations = []
+        if not indices:
+            print("✅ No citations need (uncached) reasoning validation")
+            return validated_citations
         
-        for i in range(0, len(citations), batch_size):
-            batch = citations[i:i + batch_size]
-            batch_num = (i // batch_size) + 1
-            total_batches = (len(citations) + batch_size - 1) // batch_size
-            
-            print(f"   📦 Processing batch {batch_num}/{total_batches} ({len(batch)} citations)")
+        lines = [
+            json.dumps({
+                "custom_id": f"cit-{i}",
+                "method": "POST",
+                "url": "/v1/responses",
+                "body": self._build_reasoning_request(citations[i], original_text, effort, contexts[i])
+            })
+            for i in indices
+        ]
+        
+        print(f"📤 Submitting {len(indices)} citations to the Batch API...")
+        batch_file = self.client.files.create(
+            file=("reasoning_batch.jsonl", "\n".join(lines).encode('utf-8')),
+            purpose="batch"
+        )
+        batch = self.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/responses",
+            completion_window="24h"
+        )
+        print(f"🆔 Batch ID: {batch.id}")
+        
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            if debug:
+                print(f"   ⏳ Batch status: {batch.status}")
+            time.sleep(poll_interval)
+            batch = self.client.batches.retrieve(batch.id)
+        
+        if batch.status != "completed" or not batch.output_file_id:
+            print(f"❌ Batch ended with status: {batch.status}")
+            return validated_citations
+        
+        output = self.client.files.content(batch.output_file_id).text
+        for line in output.splitlines():
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            index = int(record["custom_id"].split("-", 1)[1])
+            response = record.get("response") or {}
+            body = response.get("body") or {}
+            if response.get("status_code") != 200 or body.get("status") == "incomplete":
+                logger.warning("      ⚠️  No usable reasoning result for citation %d", index + 1)
+                continue
             
-            batch_validated = self.validate_citations_with_reasoning(
-                batch, original_text, effort, debug
+            output_text = "".join(
+                part.get("text", "")
+                for item in body.get("output", []) if item.get("type") == "message"
+                for part in item.get("content", []) if part.get("type") == "output_text"
             )
-            
-            validated_citations.extend(batch_validated)
-            
-            # Add delay between batches to respect rate limits
-            if i + batch_size < len(citations):
-                import time
-                time.sleep(1)  # 1 second delay between batches
+            validated_citation = self._parse_reasoning_response(output_text, citations[index], debug)
+            if validated_citation:
+                validated_citations[index] = validated_citation
+                self.response_cache.set(cache_keys[index], json.dumps(validated_citation))
+                if on_result:
+                    on_result(index, validated_citation)
         
+        print(f"✅ Batch reasoning validation complete: {len(indices)} citations processed")
         return validated_citations
+    
+    def _load_checkpoint(self, checkpoint_path: str, citations: List[Dict[str, Any]]) -> Dict[int, Dict[str, Any]]:
+        """Load validated citations from a JSONL checkpoint, keeping entries that match the input"""
+        done = {}
+        path = Path(checkpoint_path)
+        if not path.exists():
+            return done
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Partially written line from an interrupted run
+                index = entry.get('index')
+                if isinstance(index, int) and 0 <= index < len(citations) \
+                        and entry.get('orig') == citations[index].get('orig'):
+                    done[index] = entry['citation']
+        return done
+    
+    def iter_validate_with_reasoning(
+        self, 
+        citations: List[Dict[str, Any]], 
+        original_text: str,
+        effort: ReasoningEffort = ReasoningEffort.MEDIUM,
+        batch_size: int = 5,
+        debug: bool = False,
+        use_batch_api: bool = False,
+        checkpoint_path: Optional[str] = None
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Validate all citations concurrently, yielding them in input order in batches of batch_size
+        
+        With use_batch_api=True all citations are submitted as a single
+        OpenAI Batch API job instead (cheaper, but not interactive).
+        With checkpoint_path, each validated citation is appended to a JSONL file
+        as it completes and citations already recorded there are not sent again;
+        citations whose reasoning failed are not recorded, so a resume retries them.
+        """
+        if not citations:
+            return
+        
+        done = self._load_checkpoint(checkpoint_path, citations) if checkpoint_path else {}
+        if done:
+            print(f"♻️  Resuming from checkpoint: {len(done)} citations already validated")
+        pending = [i for i in range(len(citations)) if i not in done]
+        
+        if use_batch_api:
+            if pending:
+                with self._checkpoint_writer(checkpoint_path, citations) as record:
+                    def on_result(j: int, citation: Dict[str, Any]):
+                        done[pending[j]] = record(pending[j], citation)
+                    validated = self.validate_with_batch_api(
+                        [citations[i] for i in pending], original_text, effort, debug, on_result=on_result
+                    )
+                # Citations whose reasoning failed are returned unchanged but not checkpointed
+                for i, citation in zip(pending, validated):
+                    done.setdefault(i, citation)
+            yield [done[i] for i in range(len(citations))]
+            return
+        
+        print(f"📦 Validating {len(pending)} citations, yielding in batches of {batch_size}...")
+        
+        # All pending citations run in one event loop (on a worker thread, so this
+        # generator can yield meanwhile); each result is checkpointed as it completes
+        # and handed back through the queue. None marks the end of the run.
+        results: "queue.Queue[Optional[Tuple[int, Dict[str, Any]]]]" = queue.Queue()
+        errors: List[BaseException] = []
+        
+        def run():
+            try:
+                with self._checkpoint_writer(checkpoint_path, citations) as record:
+                    asyncio.run(self.avalidate_citations_with_reasoning(
+                        [citations[i] for i in pending], original_text, effort, debug,
+                        on_result=lambda j, citation: results.put((pending[j], record(pending[j], citation)))
+                    ))
+            except BaseException as e:
+                errors.append(e)
+            finally:
+                results.put(None)
+        
+        if pending:
+            threading.Thread(target=run, daemon=True).start()
+        finished = not pending
+        
+        total_batches = (len(citations) + batch_size - 1) // batch_size
+        for batch_num, i in enumerate(range(0, len(citations), batch_size), 1):
+            indices = range(i, min(i + batch_size, len(citations)))
+            while not finished and any(j not in done for j in indices):
+                result = results.get()
+                if result is None:
+                    finished = True
+                else:
+                    done[result[0]] = result[1]
+            if errors:
+                raise errors[0]
+            
+            print(f"   📦 Batch {batch_num}/{total_batches} complete ({len(indices)} citations)")
+            # Citations whose reasoning failed come back unchanged and stay out of the checkpoint
+            yield [done.get(j, citations[j]) for j in indices]
+    
+    @contextmanager
+    def _checkpoint_writer(self, checkpoint_path: Optional[str],
+                           citations: List[Dict[str, Any]]) -> Iterator[Callable[[int, Dict[str, Any]], Dict[str, Any]]]:
+        """Yield record(index, citation), which appends one validated citation to the checkpoint and returns it"""
+        if not checkpoint_path:
+            yield lambda i, citation: citation
+            return
+        with open(checkpoint_path, 'a', encoding='utf-8') as f:
+            def record(i: int, citation: Dict[str, Any]) -> Dict[str, Any]:
+                f.write(json.dumps({"index": i, "orig": citations[i].get('orig'), "citation": citation}) + "\n")
+                f.flush()
+                return citation
+            yield record
+    
+    def batch_validate_with_reasoning(
+        self, 
+        citations: List[Dict[str, Any]], 
+        original_text: str,
+        effort: ReasoningEffort = ReasoningEffort.MEDIUM,
+        batch_size: int = 5,
+        debug: bool = False,
+        use_batch_api: bool = False,
+        checkpoint_path: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Validate citations in batches to manage API costs and rate limits
+        """
+        return [
+            citation
+            for batch in self.iter_validate_with_reasoning(
+                citations, original_text, effort, batch_size, debug, use_batch_api, checkpoint_path
+            )
+            for citation in batch
+        ]
+
+def _dumps_json(obj: Any) -> str:
+    """Serialize to compact JSON, using orjson if available"""
+    return orjson.dumps(obj).decode('utf-8') if ORJSON_AVAILABLE else json.dumps(obj)
 
 def main():
     """CLI interface for reasoning citation validator"""
@@ -415,10 +854,21 @@ def main():
         print("  --debug: Enable debug output")
         print("  --effort low|medium|high: Reasoning effort level (default: medium)")
         print("  --batch-size N: Batch size for processing (default: 5)")
+        print("  --batch-api: Submit through the OpenAI Batch API (half price, may take hours)")
+        print("  --checkpoint FILE: Record progress in a JSONL file and resume from it on rerun")
+        print(f"  --context-chars N: Characters of context around each citation (default: {DEFAULT_CONTEXT_CHARS})")
         sys.exit(1)
     
     command = sys.argv[1].lower()
     debug = "--debug" in sys.argv
+    logging.basicConfig(level=logging.DEBUG if debug else logging.INFO, format="%(message)s", stream=sys.stdout)
+    use_batch_api = "--batch-api" in sys.argv
+    
+    checkpoint_path = None
+    if "--checkpoint" in sys.argv:
+        i = sys.argv.index("--checkpoint")
+        if i + 1 < len(sys.argv):
+            checkpoint_path = sys.argv[i + 1]
     
     # Parse effort level
     effort = ReasoningEffort.MEDIUM
@@ -440,6 +890,16 @@ def main():
                 print(f"❌ Invalid batch size: {sys.argv[i + 1]}")
                 sys.exit(1)
     
+    # Parse context size
+    context_chars = DEFAULT_CONTEXT_CHARS
+    for i, arg in enumerate(sys.argv):
+        if arg == "--context-chars" and i + 1 < len(sys.argv):
+            try:
+                context_chars = int(sys.argv[i + 1])
+            except ValueError:
+                print(f"❌ Invalid context size: {sys.argv[i + 1]}")
+                sys.exit(1)
+    
     if command == "validate":
         if len(sys.argv) < 4:
             print("❌ Citations file and original text file required")
@@ -451,48 +911,50 @@ def main():
         
         # Load citations
         try:
-            with open(citations_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                citations = data.get('citations', []) if isinstance(data, dict) else data
+            raw = Path(citations_file).read_bytes()
+            data = orjson.loads(raw) if ORJSON_AVAILABLE else json.loads(raw)
+            citations = data.get('citations', []) if isinstance(data, dict) else data
         except Exception as e:
             print(f"❌ Failed to load citations: {e}")
             sys.exit(1)
         
         # Load original text
         try:
-            with open(text_file, 'r', encoding='utf-8') as f:
-                original_text = f.read()
+            original_text = Path(text_file).read_text(encoding='utf-8')
         except Exception as e:
             print(f"❌ Failed to load original text: {e}")
             sys.exit(1)
         
         # Initialize validator
-        validator = ReasoningCitationValidator()
+        validator = ReasoningCitationValidator(context_chars=context_chars)
         
-        # Validate citations
-        validated_citations = validator.batch_validate_with_reasoning(
-            citations, original_text, effort, batch_size, debug
+        # Validate citations, writing each batch out as it completes
+        batches = validator.iter_validate_with_reasoning(
+            citations, original_text, effort, batch_size, debug, use_batch_api, checkpoint_path
         )
-        
-        # Save results
-        results = {
-            "analysis_summary": {
-                "total_citations_processed": len(citations),
-                "citations_validated": len(validated_citations),
-                "reasoning_effort": effort.value,
-                "batch_size": batch_size
-            },
-            "citations": validated_citations
-        }
+        validated_count = 0
         
         if output_file:
             with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(results, f, indent=2)
+                f.write('{\n  "citations": [')
+                for batch in batches:
+                    for citation in batch:
+                        f.write(',\n    ' if validated_count else '\n    ')
+                        f.write(_dumps_json(citation))
+                        validated_count += 1
+                summary = {
+                    "total_citations_processed": len(citations),
+                    "citations_validated": validated_count,
+                    "reasoning_effort": effort.value,
+                    "batch_size": batch_size
+                }
+                f.write('\n  ],\n  "analysis_summary": ' + _dumps_json(summary) + '\n}\n')
             print(f"✅ Results saved to: {output_file}")
         else:
+            validated_count = sum(len(batch) for batch in batches)
             print("\n📊 VALIDATION RESULTS:")
             print(f"   • Total citations processed: {len(citations)}")
-            print(f"   • Citations validated: {len(validated_citations)}")
+            print(f"   • Citations validated: {validated_count}")
             print(f"   • Reasoning effort: {effort.value}")
     
     else:
@@ -0,0 +1,72 @@
+"""
+Response Cache - Persistent SQLite cache for deterministic LLM responses
+"""
+import hashlib
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Optional, Any
+
+DEFAULT_CACHE_FILE = Path(__file__).parent.parent / '.llm_cache.sqlite'
+DEFAULT_TTL_SECONDS = 7 * 24 * 60 * 60  # One week
+
+# Responses are only cached when sampling is effectively deterministic
+MAX_CACHEABLE_TEMPERATURE = 0.01
+
+class ResponseCache:
+    """On-disk cache of LLM responses keyed by a SHA-256 hash of the request"""
+
+    def __init__(self, db_path: Optional[Path] = None):
+        self.db_path = Path(db_path) if db_path else DEFAULT_CACHE_FILE
+        try:
+            with closing(self._connect()) as conn, conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS responses ("
+                    "hash TEXT PRIMARY KEY, response BLOB, created_at INT, expires_at INT)"
+                )
+        except sqlite3.Error as e:
+            print(f"Warning: Could not initialize response cache: {e}")
+
+    def _connect(self) -> sqlite3.Connection:
+        # A connection per operation keeps the cache safe to use from worker threads
+        return sqlite3.connect(self.db_path, timeout=5)
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """Build a cache key from the request parts (text, instruction, settings, model)"""
+        hasher = hashlib.sha256()
+        for part in parts:
+            hasher.update(str(part).encode('utf-8'))
+            hasher.update(b'\0')
+        return hasher.hexdigest()
+
+    @staticmethod
+    def is_cacheable(temperature: float) -> bool:
+        """Check if a request at this temperature is deterministic enough to cache"""
+        return temperature <= MAX_CACHEABLE_TEMPERATURE
+
+    def get(self, key: str) -> Optional[str]:
+        """Get a cached response, or None if missing or expired"""
+        try:
+            with closing(self._connect()) as conn:
+                row = conn.execute(
+                    "SELECT response FROM responses WHERE hash = ? AND expires_at > ?",
+                    (key, int(time.time()))
+                ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Warning: Could not read response cache: {e}")
+            return None
+        return row[0].decode('utf-8') if row else None
+
+    def set(self, key: str, value: str, ttl: int = DEFAULT_TTL_SECONDS):
+        """Store a response in the cache"""
+        now = int(time.time())
+        try:
+            with closing(self._connect()) as conn, conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (hash, response, created_at, expires_at) VALUES (?, ?, ?, ?)",
+                    (key, value.encode('utf-8'), now, now + ttl)
+                )
+        except sqlite3.Error as e:
+            print(f"Warning: Could not write response cache: {e}")
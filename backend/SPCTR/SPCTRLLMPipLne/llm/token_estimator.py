@@ -5,6 +5,10 @@ import re
 from pathlib import Path
 from typing import List, Dict, Tuple, Optional, Any
 
+# Compiled once: estimate_tokens runs per paragraph when batching large documents
+XML_TAG_RE = re.compile(r'<[^>]+>')
+ANCHOR_TOKEN_RE = re.compile(r'<A\d{3}>')
+
 class TokenEstimator:
     """Estimate tokens and manage text batching for LLM processing"""
     
@@ -34,8 +38,8 @@ class TokenEstimator:
         
         # Adjust for special characters and formatting
         # Anchor tokens, XML tags, and special formatting use more tokens
-        special_chars = len(re.findall(r'<[^>]+>', text))  # XML tags
-        anchor_tokens = len(re.findall(r'<A\d{3}>', text))  # Anchor tokens
+        special_chars = len(XML_TAG_RE.findall(text))  # XML tags
+        anchor_tokens = len(ANCHOR_TOKEN_RE.findall(text))  # Anchor tokens
         
         # Estimate: ~4 chars per token, but special elements use more
         base_tokens = char_count / 4
@@ -58,8 +62,7 @@ class TokenEstimator:
             return []
         
         # Find all anchor tokens and their positions
-        anchor_pattern = r'<A\d{3}>'
-        anchors = list(re.finditer(anchor_pattern, text))
+        anchors = list(ANCHOR_TOKEN_RE.finditer(text))
         
         if not anchors:
             # No anchors found, split by paragraphs
@@ -196,12 +196,16 @@ class MetadataManager:
         cutoff_time = time.time() - (days_to_keep * 24 * 60 * 60)
         cleaned_count = 0
         
-        for metadata_file in self.metadata_dir.glob("*_metadata.json"):
-            if metadata_file.stat().st_mtime < cutoff_time:
+        # One directory sweep; DirEntry carries the type (and on Windows the stat) from the listing
+        with os.scandir(self.metadata_dir) as entries:
+            for entry in entries:
+                if not entry.name.endswith("_metadata.json") or not entry.is_file():
+                    continue
                 try:
-                    metadata_file.unlink()
-                    cleaned_count += 1
-                except Exception:
+                    if entry.stat().st_mtime < cutoff_time:
+                        os.unlink(entry.path)
+                        cleaned_count += 1
+                except OSError:
                     continue
         
         if cleaned_count > 0: